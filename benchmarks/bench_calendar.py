@@ -0,0 +1,249 @@
+"""
+Замеры скорости горячих путей генератора календаря
+
+Только стандартная библиотека (timeit/perf_counter), окно не нужно.
+
+Запуск:
+    python benchmarks/bench_calendar.py run -o results.json
+    python benchmarks/bench_calendar.py run --compare benchmarks/baseline.json
+    python benchmarks/bench_calendar.py compare benchmarks/baseline.json results.json
+
+compare завершается с кодом 1, если какой-либо замер стал медленнее
+базового больше, чем на --threshold (по умолчанию 25%).
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from main import CALENDAR_CACHE, UniversityCalendar
+
+try:
+    import gui_app
+except ImportError:  # tkinter не установлен
+    gui_app = None
+
+# Фиксированный день, чтобы текущая неделя всегда попадала в календарь
+BENCH_TODAY = datetime.date(2025, 10, 15)
+BENCH_YEAR = 2025
+# 10^6 недель не помещаются в диапазон datetime (до 9999 года);
+# самый длинный календарь, начиная с 1 года, - около 521 тыс. недель
+LONG_WEEKS = 500_000
+LONG_YEAR = 1
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+
+
+def bench_clock():
+    return BENCH_TODAY
+
+
+def _calendar(year=BENCH_YEAR, weeks=52):
+    calendar = UniversityCalendar(year, clock=bench_clock)
+    calendar.generate(weeks)
+    return calendar
+
+
+def _generate(year, weeks):
+    calendar = UniversityCalendar(year, clock=bench_clock)
+
+    def run():
+        # Без очистки кэша замерялось бы только попадание в него
+        CALENDAR_CACHE.clear()
+        calendar.generate(weeks)
+    return run
+
+
+def _generate_cached():
+    calendar = _calendar()
+    return lambda: calendar.generate(52)
+
+
+def _get_current_week():
+    return _calendar().get_current_week
+
+
+def _get_statistics():
+    return _calendar().get_statistics
+
+
+def _print_table(weeks):
+    calendar = _calendar(weeks=weeks)
+
+    def run():
+        with open(os.devnull, 'w', encoding='utf-8') as null, \
+                contextlib.redirect_stdout(null):
+            calendar.print_table(show_notes=True)
+    return run
+
+
+def _export_csv(weeks, cleanup):
+    calendar = _calendar(weeks=weeks)
+    directory = cleanup.enter_context(tempfile.TemporaryDirectory(prefix='bench_'))
+    path = os.path.join(directory, 'calendar.csv')
+    return lambda: calendar.export_csv(path)
+
+
+def _gui_generate(weeks):
+    # Окно не создается: берется только расчетная часть GUI
+    app = gui_app.AcademicCalendarGUI.__new__(gui_app.AcademicCalendarGUI)
+    app.clock = bench_clock
+
+    def run():
+        CALENDAR_CACHE.clear()
+        data = app.generate_academic_calendar(BENCH_YEAR, weeks)
+        # Длинный календарь отдается лениво (CalendarRows) - строки
+        # строятся все, как при экспорте, иначе замер их не учитывает
+        list(data)
+    return run
+
+
+# Имя замера -> функция, возвращающая замеряемый вызов без аргументов.
+# Функция получает ExitStack для временных файлов замера
+BENCHMARKS = {
+    'generate_52': lambda cleanup: _generate(BENCH_YEAR, 52),
+    'generate_52_cached': lambda cleanup: _generate_cached(),
+    'generate_500k': lambda cleanup: _generate(LONG_YEAR, LONG_WEEKS),
+    'get_current_week': lambda cleanup: _get_current_week(),
+    'get_statistics': lambda cleanup: _get_statistics(),
+    'print_table_52': lambda cleanup: _print_table(52),
+    'print_table_5000': lambda cleanup: _print_table(5000),
+    'export_csv_52': lambda cleanup: _export_csv(52, cleanup),
+    'export_csv_5000': lambda cleanup: _export_csv(5000, cleanup),
+}
+if gui_app is not None:
+    BENCHMARKS.update({
+        'gui_generate_52': lambda cleanup: _gui_generate(52),
+        'gui_generate_5000': lambda cleanup: _gui_generate(5000),
+    })
+
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT):
+    """
+    Выполняет замеры
+
+    Args:
+        names: Имена замеров (по умолчанию - все)
+        repeat: Количество повторов; в результат идет лучший
+
+    Returns:
+        Словарь с описанием окружения и секундами на один вызов
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        with contextlib.ExitStack() as cleanup:
+            timer = timeit.Timer(BENCHMARKS[name](cleanup))
+            number, _ = timer.autorange()
+            times = timer.repeat(repeat=repeat, number=number)
+        results[name] = {
+            'seconds': min(times) / number,
+            'number': number,
+            'repeat': repeat,
+        }
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнивает результаты с базовыми
+
+    Returns:
+        Список строк (имя, базовое время, текущее время, отношение, регрессия)
+        для замеров, которые есть в обоих наборах
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['seconds'] / base['seconds']
+        rows.append((name, base['seconds'], result['seconds'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def _print_results(data):
+    for name, result in data['results'].items():
+        print(f"{name:<22} {_format_seconds(result['seconds']):>12}")
+
+
+def _print_comparison(rows, threshold):
+    print(f"{'Замер':<22} {'База':>12} {'Сейчас':>12} {'Отношение':>10}")
+    for name, base, current, ratio, regressed in rows:
+        mark = "  РЕГРЕССИЯ" if regressed else ""
+        print(f"{name:<22} {_format_seconds(base):>12} {_format_seconds(current):>12} "
+              f"{ratio:>9.2f}x{mark}")
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f"\n❌ Медленнее базы более чем на {threshold:.0%}: {regressions}")
+    else:
+        print(f"\n✓ Регрессий нет (порог {threshold:.0%})")
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры скорости генератора календаря')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Выполнить замеры')
+    run_parser.add_argument('names', nargs='*', metavar='NAME',
+                            help='Замеры (по умолчанию - все): ' + ', '.join(BENCHMARKS))
+    run_parser.add_argument('-o', '--output', help='Сохранить результаты в JSON')
+    run_parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument('--compare', metavar='BASELINE', help='Сравнить с базовым JSON')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser('compare', help='Сравнить два JSON с результатами')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        rows = compare(_load(args.baseline), _load(args.current), args.threshold)
+        return 1 if _print_comparison(rows, args.threshold) else 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"неизвестные замеры: {', '.join(unknown)}")
+
+    data = run_benchmarks(args.names, args.repeat)
+    _print_results(data)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"\n💾 Результаты сохранены: {args.output}")
+    if args.compare:
+        print()
+        rows = compare(_load(args.compare), data, args.threshold)
+        return 1 if _print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
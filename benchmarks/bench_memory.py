@@ -0,0 +1,186 @@
+"""
+Замеры памяти генератора календаря (tracemalloc)
+
+Для каждого замера сообщаются пиковая память во время вызова и память,
+оставшаяся занятой результатом, в пересчете на неделю. Бюджеты из
+BUDGETS проверяются тестами (test/test_calendar.py).
+
+Запуск:
+    python benchmarks/bench_memory.py
+"""
+
+import contextlib
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from typing import NamedTuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from main import CALENDAR_CACHE, UniversityCalendar
+
+try:
+    import gui_app
+except ImportError:  # tkinter не установлен
+    gui_app = None
+
+BENCH_TODAY = datetime.date(2025, 10, 15)
+BENCH_YEAR = 2025
+
+
+class MemoryResult(NamedTuple):
+    """Результат замера в байтах"""
+    weeks: int
+    peak: int
+    retained: int
+
+    @property
+    def peak_per_week(self) -> float:
+        return self.peak / self.weeks
+
+    @property
+    def retained_per_week(self) -> float:
+        return self.retained / self.weeks
+
+
+def bench_clock():
+    return BENCH_TODAY
+
+
+def measure(func, weeks):
+    """
+    Пиковая и оставшаяся после вызова память для func()
+
+    Вызов выполняется один раз вхолостую, чтобы не учитывать
+    ленивые импорты и внутренние кэши модулей.
+    """
+    func()
+    gc.collect()
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    # Снимки исключают память самого tracemalloc
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del result
+    return MemoryResult(weeks, peak - base, retained)
+
+
+def _generate(weeks, year=BENCH_YEAR):
+    def run():
+        # Без очистки кэша замерялось бы только попадание в него
+        CALENDAR_CACHE.clear()
+        return UniversityCalendar(year, clock=bench_clock).generate(weeks)
+    return run
+
+
+def _gui_calendar_data(weeks):
+    # Окно не создается: берется только расчетная часть GUI
+    app = gui_app.AcademicCalendarGUI.__new__(gui_app.AcademicCalendarGUI)
+    app.clock = bench_clock
+
+    def run():
+        CALENDAR_CACHE.clear()
+        return app.build_calendar_data(BENCH_YEAR, weeks)
+    return run
+
+
+def _temp_path(cleanup, filename):
+    """Путь во временном каталоге, который удалится при закрытии cleanup"""
+    directory = cleanup.enter_context(tempfile.TemporaryDirectory(prefix='bench_'))
+    return os.path.join(directory, filename)
+
+
+def _export_csv(weeks, cleanup):
+    calendar = UniversityCalendar(1, clock=bench_clock)
+    calendar.generate(weeks)
+    path = _temp_path(cleanup, 'calendar.csv')
+    return lambda: calendar.export_csv(path)
+
+
+def _export_xlsx(weeks, cleanup):
+    calendar = UniversityCalendar(1, clock=bench_clock)
+    calendar.generate(weeks)
+    path = _temp_path(cleanup, 'calendar.xlsx')
+    return lambda: calendar.export_xlsx(path)
+
+
+# Имя замера -> (функция, возвращающая замеряемый вызов, число недель).
+# Функция получает ExitStack для временных файлов замера
+MEASUREMENTS = {
+    'generate_52': (lambda cleanup: _generate(52), 52),
+    'generate_100k': (lambda cleanup: _generate(100_000, year=1), 100_000),
+    'export_csv_20k': (lambda cleanup: _export_csv(20_000, cleanup), 20_000),
+    'export_xlsx_10k': (lambda cleanup: _export_xlsx(10_000, cleanup), 10_000),
+}
+if gui_app is not None:
+    # До VIRTUAL_THRESHOLD недель GUI держит словарь на неделю, дальше - ленивый список
+    MEASUREMENTS.update({
+        'gui_calendar_data_list': (lambda cleanup: _gui_calendar_data(150), 150),
+        'gui_calendar_data_lazy': (lambda cleanup: _gui_calendar_data(100_000), 100_000),
+    })
+
+# Бюджеты в байтах: на неделю (*_per_week) или на весь вызов (peak)
+BUDGETS = {
+    'generate_52': {'retained_per_week': 128},
+    'generate_100k': {'retained_per_week': 16, 'peak_per_week': 24},
+    'export_csv_20k': {'peak': 512 * 1024, 'retained': 16 * 1024},
+    # Буфер строк листа и сжатие zip; от числа недель не зависит
+    'export_xlsx_10k': {'peak': 4 * 1024 * 1024, 'retained': 16 * 1024},
+    'gui_calendar_data_list': {'retained_per_week': 640},
+    'gui_calendar_data_lazy': {'retained_per_week': 16, 'peak_per_week': 24},
+}
+
+
+def run_measurements(names=None):
+    results = {}
+    for name in names or MEASUREMENTS:
+        factory, weeks = MEASUREMENTS[name]
+        with contextlib.ExitStack() as cleanup:
+            results[name] = measure(factory(cleanup), weeks)
+    return results
+
+
+def check_budget(name, result):
+    """Список нарушений бюджета замера name (пустой, если все в норме)"""
+    violations = []
+    for metric, limit in BUDGETS.get(name, {}).items():
+        value = getattr(result, metric)
+        if value > limit:
+            violations.append(f"{name}: {metric} = {value:.0f} > {limit}")
+    return violations
+
+
+def main():
+    results = run_measurements()
+    print(f"{'Замер':<26} {'Недель':>8} {'Пик':>12} {'Остаток':>12} {'Пик/нед':>9} {'Ост/нед':>9}")
+    violations = []
+    for name, result in results.items():
+        print(f"{name:<26} {result.weeks:>8} {result.peak:>12} {result.retained:>12} "
+              f"{result.peak_per_week:>9.1f} {result.retained_per_week:>9.1f}")
+        violations += check_budget(name, result)
+    if violations:
+        print("\n❌ Превышены бюджеты:")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+    print("\n✓ Все замеры в пределах бюджетов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
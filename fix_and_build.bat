@@ -57,6 +57,7 @@ pyinstaller --clean ^
             --name "%APP_NAME%" ^
             --add-data "src;src" ^
             --collect-all tkinter ^
+            --exclude-module numpy ^
             run_gui.py
 
 if errorlevel 1 (
@@ -0,0 +1,134 @@
+"""
+Параллельная разметка больших CSV-файлов номером недели и четностью
+
+Файл читается один раз: он делится на диапазоны байтов по границам
+строк, каждый диапазон размечается в отдельном процессе во временный
+файл, затем части склеиваются в исходном порядке. Формат - как у
+export_csv(): разделитель ';', UTF-8 (с BOM или без), без переводов
+строк внутри значений.
+"""
+
+import csv
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from config import DEFAULT_SETTINGS
+from main import PARITY_SYMBOLS, _locate, parse_date
+
+ADDED_COLUMNS = ['Номер недели', 'Четность']
+CHUNK_SIZE = 32 * 1024 * 1024
+BOM = b'\xef\xbb\xbf'
+
+
+def _parse_day(text: str) -> datetime.date:
+    """Быстрый разбор ДД.ММ.ГГГГ срезами, остальные форматы - parse_date()"""
+    if len(text) == 10 and text[2] == '.' and text[5] == '.':
+        try:
+            return datetime.date(int(text[6:]), int(text[3:5]), int(text[:2]))
+        except ValueError:
+            pass
+    return parse_date(text)
+
+
+def _annotate_range(source_path: str, begin: int, end: int, column: int,
+                    part_path: str, delimiter: str) -> int:
+    """Размечает строки из диапазона байтов [begin, end) в файл part_path"""
+    with open(source_path, 'rb') as f:
+        f.seek(begin)
+        data = f.read(end - begin)
+
+    # Даты в журналах сильно повторяются - разбираем каждую один раз
+    cache = {}
+    count = 0
+    with open(part_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out, delimiter=delimiter)
+        # splitlines() резал бы строки и по \x0c, \x1c, \x85, \u2028 внутри значений
+        text = io.StringIO(data.decode('utf-8'), newline='')
+        for row in csv.reader(text, delimiter=delimiter):
+            if not row:
+                continue
+            value = row[column].strip() if column < len(row) else ''
+            added = cache.get(value)
+            if added is None:
+                try:
+                    day = _parse_day(value)
+                    _, week_number, parity_bit = _locate(day.toordinal(), day.year)
+                    added = [week_number, PARITY_SYMBOLS[parity_bit]]
+                except ValueError:
+                    added = ['', '']
+                cache[value] = added
+            row.extend(added)
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _split_ranges(path: str, begin: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Делит файл с позиции begin на диапазоны, выровненные по концам строк"""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        while begin < size:
+            f.seek(min(begin + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((begin, end))
+            begin = end
+    return ranges
+
+
+def annotate_csv(source_path: str, target_path: str, date_column: str,
+                 jobs: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Добавляет к CSV столбцы с номером недели и четностью
+
+    Args:
+        source_path: Исходный CSV-файл
+        target_path: Файл результата
+        date_column: Имя столбца с датой (ДД.ММ.ГГГГ или ГГГГ-ММ-ДД)
+        jobs: Количество процессов (по умолчанию - число ядер)
+        chunk_size: Примерный размер части в байтах
+
+    Returns:
+        Количество размеченных строк
+    """
+    delimiter = DEFAULT_SETTINGS['csv_separator']
+
+    with open(source_path, 'rb') as f:
+        header_line = f.readline()
+        header_end = f.tell()
+    has_bom = header_line.startswith(BOM)
+    header = next(csv.reader([header_line[len(BOM) if has_bom else 0:].decode('utf-8')],
+                             delimiter=delimiter), [])
+    if date_column not in header:
+        raise ValueError(f"В файле нет столбца {date_column!r}")
+    column = header.index(date_column)
+
+    ranges = _split_ranges(source_path, header_end, chunk_size)
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+
+    with tempfile.TemporaryDirectory(dir=target_dir) as tmp:
+        parts = [os.path.join(tmp, f"part_{i:05d}.csv") for i in range(len(ranges))]
+        tasks = [(source_path, begin, end, column, part, delimiter)
+                 for (begin, end), part in zip(ranges, parts)]
+
+        if jobs == 1 or len(tasks) <= 1:
+            counts = [_annotate_range(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                counts = list(executor.map(_annotate_range, *zip(*tasks)))
+
+        with open(target_path, 'wb') as out:
+            with open(os.path.join(tmp, 'header.csv'), 'w', newline='',
+                      encoding='utf-8-sig' if has_bom else 'utf-8') as f:
+                csv.writer(f, delimiter=delimiter).writerow(header + ADDED_COLUMNS)
+            for part in [os.path.join(tmp, 'header.csv')] + parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+
+    return sum(counts)
@@ -8,40 +8,154 @@ from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
 import datetime
-from datetime import timedelta
 import csv
+import json
 import os
 import locale
+import queue
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from main import (CSV_HEADER, PARITY_ODD, XLSX_COLUMN_WIDTHS, PhaseTimer, first_week_anchor,
+                  format_date, get_calendar, parse_date, sept_1_weekday)
+from xlsx_export import STYLE_CURRENT, STYLE_EVEN, STYLE_ODD, write_xlsx
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_NAME = ".nefu_calendar_snapshot.json"
+
+# Непустое значение переменной окружения включает замер этапов
+TIMINGS_ENV = "NEFU_CALENDAR_TIMINGS"
+TIMINGS_LOG_NAME = ".nefu_calendar_timings.log"
+
+
+def _data_dir():
+    """Каталог данных программы: %APPDATA% в Windows, иначе домашний каталог"""
+    return os.environ.get('APPDATA') or os.path.expanduser("~")
+
+
+def snapshot_path():
+    """Файл снимка последнего сеанса"""
+    return os.path.join(_data_dir(), SNAPSHOT_NAME)
+
+
+def timings_enabled():
+    return bool(os.environ.get(TIMINGS_ENV))
+
+
+def timings_log_path():
+    """Журнал замеров времени этапов"""
+    return os.path.join(_data_dir(), TIMINGS_LOG_NAME)
+
+
+def week_row(week):
+    """Строка таблицы GUI для недели AcademicWeek"""
+    return {
+        'week_num': week.number,
+        'start_date': week.start_date,
+        'end_date': week.end_date,
+        'parity': "нечётная" if week.parity == PARITY_ODD else "чётная",
+        'is_current': week.is_current,
+        'contains_sept_1': week.contains_sept_1
+    }
+
+
+class CalendarRows(Sequence):
+    """
+    Ленивый список строк таблицы поверх WeekTable
+
+    Строка строится при обращении по индексу за O(1), поэтому
+    календарь на тысячи недель не хранит тысячи словарей.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [week_row(week) for week in self.table[index]]
+        return week_row(self.table[index])
+
+    def __iter__(self):
+        # Обход и срез опрашивают часы один раз, а не на каждую строку
+        return (week_row(week) for week in self.table)
 
 
 class AcademicCalendarGUI:
     """Главное окно приложения"""
     
-    def __init__(self, root):
+    # Период опроса результатов фоновой генерации, мс
+    GENERATION_POLL_MS = 30
+    # Наибольшее число недель, которое можно запросить
+    MAX_WEEKS = 10000
+    # Начиная с этого числа недель таблица показывает только видимое окно
+    VIRTUAL_THRESHOLD = 200
+    # Высота строки таблицы и заголовка, пикс.
+    ROW_HEIGHT = 22
+    HEADER_HEIGHT = 24
+    # Запас после полуночи перед обновлением панели "СЕГОДНЯ", мс
+    MIDNIGHT_MARGIN_MS = 1000
+    # Сколько заранее посчитанных календарей соседних лет хранить
+    PREFETCH_CACHE_SIZE = 4
+    # Варианты фильтра по четности и соответствующие значения 'parity'
+    FILTER_PARITY_CHOICES = ("Все", "Нечётные", "Чётные")
+    FILTER_PARITY_VALUES = {"Нечётные": "нечётная", "Чётные": "чётная"}
+    
+    def __init__(self, root, clock=None):
         self.root = root
+        # Часы для определения сегодняшнего дня (подменяются в тестах и замерах)
+        self.clock = clock or datetime.date.today
         self.root.title("NEFU Генератор четности недель")
-    
-        try:
-            locale.setlocale(locale.LC_TIME, 'ru_RU.UTF-8')
-        except:
-            try:
-                locale.setlocale(locale.LC_TIME, 'Russian_Russia.1251')
-            except:
-                pass
         
         self.setup_styles()
         
         self.calendar_data = []
+        
+        # Фоновая генерация: номер последнего запроса и очередь результатов
+        self._generation_id = 0
+        self._generation_pending = False
+        self._generation_results = queue.Queue()
+        self._generation_poll_job = None
+        
+        # Таймер смены дня и индекс недели, отмеченной как текущая
+        self._midnight_job = None
+        self.current_week_index = None
+        
+        # Календари соседних лет, посчитанные заранее: (год, недель) -> (день, данные)
+        self._prefetched = OrderedDict()
+        self._prefetch_lock = threading.Lock()
 
         self.current_year = self.get_current_academic_year()
         
         self.create_widgets()
 
+        # Сначала показываем снимок прошлого сеанса, остальное - после
+        # первой отрисовки. update_idletasks() до mainloop() выполнил бы и
+        # after_idle-задачи, но не таймеры: after_idle ставится из таймера
+        # уже внутри mainloop() и встает в очередь после отрисовки окна
+        self.restore_snapshot()
+        self.root.after(1, self.root.after_idle, self.finish_startup)
+    
+    def finish_startup(self):
+        """Отложенная часть запуска: локаль, свежий расчет календаря, таймер полуночи"""
+        try:
+            locale.setlocale(locale.LC_TIME, 'ru_RU.UTF-8')
+        except:
+            try:
+                locale.setlocale(locale.LC_TIME, 'Russian_Russia.1251')
+            except:
+                pass
+        
         self.auto_generate_on_startup()
+        self.schedule_midnight()
     
     def get_current_academic_year(self):
         """Определяет текущий учебный год"""
-        today = datetime.date.today()
+        today = self.clock()
         
         if today.month >= 9:  # Сентябрь-Декабрь
             return today.year
@@ -122,8 +236,8 @@ class AcademicCalendarGUI:
         self.year_var = tk.StringVar(value=str(self.current_year))
         year_spinbox = tk.Spinbox(
             control_frame, 
-            from_=2000, 
-            to=2100, 
+            from_=datetime.MINYEAR, 
+            to=datetime.MAXYEAR, 
             textvariable=self.year_var,
             width=12,
             font=("Arial", 10),
@@ -133,6 +247,7 @@ class AcademicCalendarGUI:
             borderwidth=1
         )
         year_spinbox.grid(row=0, column=1, sticky=tk.W, padx=(0, 20))
+        self.year_var.trace_add('write', self._cancel_generation)
         
         # Количество недель
         weeks_label = tk.Label(
@@ -147,7 +262,7 @@ class AcademicCalendarGUI:
         weeks_spinbox = tk.Spinbox(
             control_frame, 
             from_=1, 
-            to=100, 
+            to=self.MAX_WEEKS, 
             textvariable=self.weeks_var,
             width=8,
             font=("Arial", 10),
@@ -157,6 +272,7 @@ class AcademicCalendarGUI:
             borderwidth=1
         )
         weeks_spinbox.grid(row=0, column=3, sticky=tk.W)
+        self.weeks_var.trace_add('write', self._cancel_generation)
         
         # Кнопка генерации
         generate_btn = tk.Button(
@@ -175,6 +291,42 @@ class AcademicCalendarGUI:
         )
         generate_btn.grid(row=0, column=4, padx=(20, 0))
         
+        # Переход к неделе по дате
+        jump_label = tk.Label(
+            control_frame,
+            text="Найти дату:",
+            font=("Arial", 10),
+            bg=self.bg_color
+        )
+        jump_label.grid(row=1, column=0, sticky=tk.W, padx=(0, 8), pady=(10, 0))
+        
+        self.jump_var = tk.StringVar()
+        jump_entry = tk.Entry(
+            control_frame,
+            textvariable=self.jump_var,
+            width=12,
+            font=("Arial", 10),
+            justify=tk.CENTER,
+            bg="white",
+            relief=tk.SUNKEN,
+            borderwidth=1
+        )
+        jump_entry.grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
+        jump_entry.bind("<Return>", lambda event: self.jump_to_date())
+        
+        jump_btn = tk.Button(
+            control_frame,
+            text="ПЕРЕЙТИ",
+            command=self.jump_to_date,
+            width=10,
+            font=("Arial", 9),
+            bg="#64748b",
+            fg="white",
+            relief=tk.RAISED,
+            cursor="hand2"
+        )
+        jump_btn.grid(row=1, column=2, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
         # БОЛЬШОЙ ОТОБРАЖАТЕЛЬ ТЕКУЩЕЙ НЕДЕЛИ (компактный)
         today_display_frame = tk.Frame(left_frame, bg=self.today_bg, relief=tk.RIDGE, borderwidth=2)
         today_display_frame.pack(fill=tk.X, pady=(0, 12))
@@ -218,6 +370,9 @@ class AcademicCalendarGUI:
         )
         info_label.pack(fill=tk.X)
         
+        # ФИЛЬТР НЕДЕЛЬ
+        self.create_filter_panel(left_frame)
+        
         # ТАБЛИЦА С НЕДЕЛЯМИ (компактная)
         table_label = tk.Label(
             left_frame,
@@ -245,7 +400,7 @@ class AcademicCalendarGUI:
         # Кнопка экспорта
         export_btn = tk.Button(
             buttons_frame,
-            text="ЭКСПОРТ В CSV",
+            text="ЭКСПОРТ CSV / XLSX",
             command=self.export_to_csv,
             width=18,
             height=2,
@@ -350,136 +505,586 @@ class AcademicCalendarGUI:
         self.tree.column("end", width=100, anchor=tk.CENTER, minwidth=100)
         self.tree.column("parity", width=80, anchor=tk.CENTER, minwidth=80)
         
-        scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Выделение текущей недели
+        self.tree.tag_configure('current', background='#ffeb3b')
+        
+        # Строки таблицы по позиции среди показанных недель (в виртуальном
+        # режиме - по позиции в окне) и их последние значения
+        self.row_ids = {}
+        self.row_state = {}
+        
+        # Индексы недель calendar_data, прошедших фильтр (всегда range)
+        self.display = range(0)
+        
+        # Виртуальный режим: в таблице только видимое окно строк,
+        # полосой прокрутки управляем сами
+        self.virtual_mode = False
+        self.virtual_offset = 0
+        self.virtual_rows = self.tree.cget("height")
+        
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.tree.bind("<Configure>", self._on_tree_resize)
+        self.tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.tree.bind("<Button-4>", self._on_mouse_wheel)
+        self.tree.bind("<Button-5>", self._on_mouse_wheel)
         
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         parent.columnconfigure(0, weight=1)
         parent.rowconfigure(0, weight=1)
     
+    def create_filter_panel(self, parent):
+        """Панель фильтра: четность, диапазон дат и диапазон номеров недель"""
+        filter_frame = tk.LabelFrame(
+            parent,
+            text="ФИЛЬТР",
+            font=("Arial", 9, "bold"),
+            bg=self.bg_color,
+            fg=self.accent_color,
+            padx=8,
+            pady=6
+        )
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.filter_parity_var = tk.StringVar(value=self.FILTER_PARITY_CHOICES[0])
+        parity_box = ttk.Combobox(
+            filter_frame,
+            textvariable=self.filter_parity_var,
+            values=self.FILTER_PARITY_CHOICES,
+            state="readonly",
+            width=10
+        )
+        parity_box.grid(row=0, column=0, padx=(0, 10))
+        
+        self.filter_date_from_var = tk.StringVar()
+        self.filter_date_to_var = tk.StringVar()
+        self.filter_week_from_var = tk.StringVar()
+        self.filter_week_to_var = tk.StringVar()
+        
+        fields = [
+            ("Даты с", self.filter_date_from_var, 11),
+            ("по", self.filter_date_to_var, 11),
+            ("Недели с", self.filter_week_from_var, 5),
+            ("по", self.filter_week_to_var, 5),
+        ]
+        column = 1
+        for text, variable, width in fields:
+            tk.Label(filter_frame, text=text, font=("Arial", 9),
+                     bg=self.bg_color).grid(row=0, column=column, padx=(0, 4))
+            entry = tk.Entry(filter_frame, textvariable=variable, width=width,
+                             font=("Arial", 9), justify=tk.CENTER, bg="white")
+            entry.grid(row=0, column=column + 1, padx=(0, 8))
+            entry.bind("<Return>", lambda event: self.apply_filters())
+            column += 2
+        
+        apply_btn = tk.Button(
+            filter_frame,
+            text="ПРИМЕНИТЬ",
+            command=self.apply_filters,
+            font=("Arial", 8),
+            bg=self.accent_color,
+            fg="white",
+            relief=tk.RAISED,
+            cursor="hand2"
+        )
+        apply_btn.grid(row=0, column=column, padx=(0, 4))
+        
+        reset_btn = tk.Button(
+            filter_frame,
+            text="СБРОС",
+            command=self.reset_filters,
+            font=("Arial", 8),
+            bg="#64748b",
+            fg="white",
+            relief=tk.RAISED,
+            cursor="hand2"
+        )
+        reset_btn.grid(row=0, column=column + 1)
+        
+        # Действующий фильтр: словарь с ключами parity, date_from, date_to,
+        # week_from, week_to (None - без ограничения) или None, если не задан
+        self.filters = None
+        self.parity_index = {}
+    
     def analyze_year_structure(self, year):
         """Анализирует структуру учебного года и возвращает детали"""
         sept_1 = datetime.date(year, 9, 1)
         weekdays = ["понедельник", "вторник", "среда", 
                    "четверг", "пятница", "суббота", "воскресенье"]
+        weekday = sept_1_weekday(year)
+        start_date, _ = first_week_anchor(year)
         
-        if sept_1.weekday() == 6:  # Воскресенье
-            first_monday = sept_1 + timedelta(days=1)
-            start_date = first_monday
+        if weekday == 6:  # Воскресенье
             week_type = "special"
             first_week_parity = "ЧЁТНАЯ"
         else:
-            first_monday = sept_1 - timedelta(days=sept_1.weekday())
-            start_date = first_monday
             week_type = "normal"
             first_week_parity = "НЕЧЁТНАЯ"
         
         return {
             'year': year,
             'sept_1': sept_1,
-            'sept_1_weekday_name': weekdays[sept_1.weekday()],
+            'sept_1_weekday_name': weekdays[weekday],
             'start_date': start_date,
             'week_type': week_type,
             'first_week_parity': first_week_parity
         }
     
+    def build_calendar_data(self, start_year, total_weeks=52):
+        """
+        Строит список недель для таблицы (без обращения к Tk)
+
+        Может выполняться в фоновом потоке. Результат устаревшего
+        запроса отбрасывает _poll_generation().
+        """
+        start_year = int(start_year)
+        # Календарь берется из общего кэша (main.get_calendar);
+        # текущая неделя определяется одним обращением к часам
+        table = get_calendar(start_year, total_weeks, self.clock)
+        
+        # Длинный календарь отдается лениво - строки строятся по мере показа
+        if len(table) >= self.VIRTUAL_THRESHOLD:
+            return CalendarRows(table)
+        
+        return [week_row(week) for week in table]
+    
     def generate_academic_calendar(self, start_year, total_weeks=52):
         """Генерирует учебный календарь с правильной четностью"""
-        weeks = []
-        
         try:
-            start_year = int(start_year)
-            sept_1 = datetime.date(start_year, 9, 1)
-            
-            if sept_1.weekday() == 6:  # Воскресенье
-                first_monday = sept_1 + timedelta(days=1)
-                current_date = first_monday
-                current_parity = "чётная"
-            else:
-                first_monday = sept_1 - timedelta(days=sept_1.weekday())
-                current_date = first_monday
-                current_parity = "нечётная"
-            
-            for week_num in range(1, total_weeks + 1):
-                start_week = current_date
-                end_week = current_date + timedelta(days=6)
-                
-                parity = current_parity
-                
-                today = datetime.date.today()
-                is_current = start_week <= today <= end_week
-                contains_sept_1 = start_week <= sept_1 <= end_week
-                
-                weeks.append({
-                    'week_num': week_num,
-                    'start_date': start_week,
-                    'end_date': end_week,
-                    'parity': parity,
-                    'is_current': is_current,
-                    'contains_sept_1': contains_sept_1
-                })
-                
-                current_date += timedelta(days=7)
-                
-                # Меняем четность для следующей недели
-                current_parity = "чётная" if current_parity == "нечётная" else "нечётная"
-                
+            return self.build_calendar_data(start_year, total_weeks)
         except Exception as e:
             tk.messagebox.showerror("Ошибка", f"Ошибка генерации календаря:\n{str(e)}")
-            
-        return weeks
+            return []
     
     def generate_calendar(self):
-        """Обработчик кнопки генерации"""
+        """Обработчик кнопки генерации: запускает расчет в фоновом потоке"""
         try:
             year = int(self.year_var.get())
             weeks_count = int(self.weeks_var.get())
-            
-            self.status_var.set("Генерация календаря...")
-            self.root.update()
-            
-            self.calendar_data = self.generate_academic_calendar(year, weeks_count)
+        except ValueError:
+            tk.messagebox.showerror("Ошибка", "Пожалуйста, введите корректные числовые значения")
+            self.status_var.set("Ошибка ввода данных")
+            return
+        
+        # Новый запрос делает устаревшими все предыдущие
+        self._generation_id += 1
+        request_id = self._generation_id
+        
+        timer = PhaseTimer(enabled=timings_enabled())
+        
+        # Соседний год уже посчитан - остается только показать его
+        with timer.phase('кэш соседних лет'):
+            data = self._take_prefetched(year, weeks_count)
+        if data is not None:
+            self._generation_pending = False
+            self._apply_generation(year, data, None, timer)
+            return
+        
+        self._generation_pending = True
+        
+        self.status_var.set("Генерация календаря...")
+        
+        worker = threading.Thread(
+            target=self._generation_worker,
+            args=(request_id, year, weeks_count, timer),
+            daemon=True
+        )
+        worker.start()
+        self._schedule_generation_poll()
+    
+    def _generation_worker(self, request_id, year, weeks_count, timer=None):
+        """Фоновый поток: строит календарь и кладет результат в очередь"""
+        timer = timer or PhaseTimer(enabled=False)
+        try:
+            with timer.phase('расчет'):
+                data = self.build_calendar_data(year, weeks_count)
+            error = None
+        except Exception as e:
+            data, error = None, e
+        self._generation_results.put((request_id, year, data, error, timer))
+    
+    def _schedule_generation_poll(self):
+        if self._generation_poll_job is None:
+            self._generation_poll_job = self.root.after(
+                self.GENERATION_POLL_MS, self._poll_generation)
+    
+    def _poll_generation(self):
+        """Забирает результаты фоновых расчетов в потоке Tk"""
+        self._generation_poll_job = None
+        
+        latest = None
+        while True:
+            try:
+                result = self._generation_results.get_nowait()
+            except queue.Empty:
+                break
+            # Результаты отмененных запросов отбрасываются
+            if result[0] == self._generation_id:
+                latest = result
+        
+        if latest is not None:
+            self._generation_pending = False
+            self._apply_generation(*latest[1:])
+        elif self._generation_pending:
+            self._schedule_generation_poll()
+    
+    def _cancel_generation(self, *args):
+        """Отменяет текущий расчет при изменении года или числа недель"""
+        if self._generation_pending:
+            self._generation_id += 1
+            self._generation_pending = False
+            self.status_var.set("Генерация отменена: параметры изменены")
+    
+    def _apply_generation(self, year, data, error, timer=None):
+        """Показывает готовый календарь (вызывается в потоке Tk)"""
+        timer = timer or PhaseTimer(enabled=False)
+        if error is not None:
+            tk.messagebox.showerror("Ошибка", f"Ошибка генерации календаря:\n{str(error)}")
+            self.status_var.set("Ошибка генерации календаря")
+            return
+        
+        with timer.phase('отрисовка'):
+            self.calendar_data = data
+            self.parity_index = self.build_parity_index(data)
             
             self.update_year_info(year)
             self.update_today_info()
             
-            # Очищаем таблицу
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Заполняем таблицу
-            for week in self.calendar_data:
-                tags = ()
-                if week['is_current']:
-                    tags = ('current',)
-                
-                self.tree.insert("", tk.END,
-                    values=(
-                        week['week_num'],
-                        week['start_date'].strftime("%d.%m.%Y"),
-                        week['end_date'].strftime("%d.%m.%Y"),
-                        week['parity'].upper()
-                    ),
-                    tags=tags
-                )
-            
-            # Настраиваем теги для выделения
-            self.tree.tag_configure('current', background='#ffeb3b')
-            
-            # Статистика
+            self.refresh_table()
+        
+        # Статистика
+        if isinstance(self.calendar_data, CalendarRows):
+            odd_weeks = self.calendar_data.table.count_parity(PARITY_ODD)
+        else:
             odd_weeks = sum(1 for w in self.calendar_data if w['parity'] == "нечётная")
-            even_weeks = len(self.calendar_data) - odd_weeks
-            
-            self.status_var.set(
-                f"✓ Сгенерировано {len(self.calendar_data)} недель "
-                f"({odd_weeks} нечётных, {even_weeks} чётных)"
+        even_weeks = len(self.calendar_data) - odd_weeks
+        
+        status = (f"✓ Сгенерировано {len(self.calendar_data)} недель "
+                  f"({odd_weeks} нечётных, {even_weeks} чётных)")
+        if self.filters is not None:
+            status += f", показано {len(self.display)}"
+        self.status_var.set(status)
+        
+        with timer.phase('снимок'):
+            self.save_snapshot(year)
+        self.prefetch_neighbours(year, len(self.calendar_data))
+        self.report_timings("Генерация", timer)
+    
+    def report_timings(self, operation, timer):
+        """Добавляет время этапов к строке состояния и в журнал"""
+        if not timer.enabled or not timer.phases:
+            return
+        summary = timer.summary()
+        self.status_var.set(f"{self.status_var.get()} | ⏱ {summary}")
+        try:
+            with open(timings_log_path(), 'a', encoding='utf-8') as log:
+                log.write(f"{datetime.datetime.now().isoformat(timespec='seconds')}\t"
+                          f"{operation}\t{summary}\n")
+        except OSError:
+            pass
+    
+    def prefetch_neighbours(self, year, weeks_count):
+        """Считает в фоне календари для year-1 и year+1"""
+        years = [y for y in (year - 1, year + 1) if datetime.MINYEAR <= y <= datetime.MAXYEAR]
+        worker = threading.Thread(
+            target=self._prefetch_worker,
+            args=(years, weeks_count),
+            daemon=True
+        )
+        worker.start()
+    
+    def _prefetch_worker(self, years, weeks_count):
+        for year in years:
+            key = (year, weeks_count)
+            with self._prefetch_lock:
+                if key in self._prefetched:
+                    continue
+            day = self.clock()
+            try:
+                data = self.build_calendar_data(year, weeks_count)
+            except Exception:
+                # Ошибку покажет обычная генерация, если год все же выберут
+                continue
+            with self._prefetch_lock:
+                self._prefetched[key] = (day, data)
+                self._prefetched.move_to_end(key)
+                while len(self._prefetched) > self.PREFETCH_CACHE_SIZE:
+                    self._prefetched.popitem(last=False)
+    
+    def _take_prefetched(self, year, weeks_count):
+        """Забирает заранее посчитанный календарь, если он сделан сегодня"""
+        with self._prefetch_lock:
+            entry = self._prefetched.pop((year, weeks_count), None)
+        if entry is None or entry[0] != self.clock():
+            return None
+        return entry[1]
+    
+    def save_snapshot(self, year):
+        """Сохраняет показанный календарь для быстрого следующего запуска"""
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'date': self.clock().isoformat(),
+            'year': year,
+            'weeks': len(self.calendar_data),
+            'info': self.info_text.get(),
+            'today': self.today_info_text.get(),
+            'virtual': self.virtual_mode,
+            'offset': self.virtual_offset,
+            'rows': [[key, list(values), list(tags)]
+                     for key, (values, tags) in self.row_state.items()]
+        }
+        path = snapshot_path()
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+    
+    def restore_snapshot(self):
+        """
+        Рисует снимок прошлого сеанса, если он сделан для текущего учебного года
+
+        Строки заносятся в row_ids/row_state, так что свежий расчет
+        меняет только отличающиеся ячейки. Панель "СЕГОДНЯ" берется из
+        снимка, только если он сделан сегодня.
+
+        Returns:
+            True, если снимок показан
+        """
+        try:
+            with open(snapshot_path(), encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version') != SNAPSHOT_VERSION or snapshot['year'] != self.current_year:
+                return False
+            weeks = int(snapshot['weeks'])
+            rows = sorted((int(key), tuple(values), tuple(tags))
+                          for key, values, tags in snapshot['rows'])
+            virtual = bool(snapshot['virtual'])
+            offset = int(snapshot['offset'])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        
+        self.weeks_var.set(str(weeks))
+        self.info_text.set(snapshot.get('info', ""))
+        if snapshot.get('date') == self.clock().isoformat():
+            self.today_info_text.set(snapshot.get('today', ""))
+        
+        self.virtual_mode = virtual
+        self.virtual_offset = offset
+        for key, values, tags in rows:
+            self.row_ids[key] = self.tree.insert("", tk.END, values=values, tags=tags)
+            self.row_state[key] = (values, tags)
+        return True
+    
+    def refresh_table(self):
+        """
+        Приводит таблицу к calendar_data, меняя только отличающиеся строки
+
+        Строки хранятся по позиции среди показанных недель: при смене
+        года обновляются только ячейки с датами и четностью, при смене
+        дня - только тег текущей недели; лишние строки удаляются,
+        недостающие добавляются. Длинный список показывается в
+        виртуальном режиме.
+        """
+        self.display = self.filtered_indices()
+        
+        virtual = len(self.display) >= self.VIRTUAL_THRESHOLD
+        if virtual != self.virtual_mode:
+            # Ключи строк в режимах разные - начинаем с пустой таблицы
+            self._clear_rows()
+            self.virtual_mode = virtual
+            self.virtual_offset = 0
+        
+        if virtual:
+            self._set_virtual_offset(self.virtual_offset, force=True)
+        else:
+            self._sync_rows(enumerate(self._rows_at(self.display)))
+    
+    def build_parity_index(self, data):
+        """
+        Индексы нечётных и чётных недель
+
+        Четность в календаре чередуется, поэтому каждый список - range
+        с шагом 2: память O(1), срез и поиск по нему - O(1) и O(log n).
+        """
+        if not data:
+            return {"нечётная": range(0), "чётная": range(0)}
+        first_odd = 0 if data[0]['parity'] == "нечётная" else 1
+        return {
+            "нечётная": range(first_odd, len(data), 2),
+            "чётная": range(1 - first_odd, len(data), 2),
+        }
+    
+    def filtered_indices(self):
+        """
+        Индексы недель, прошедших фильтр, в виде range
+
+        Границы дат переводятся в индексы арифметически от начала
+        показанного календаря, поэтому фильтр остается верным и после
+        смены года.
+        """
+        total = len(self.calendar_data)
+        if self.filters is None or not total:
+            return range(total)
+        
+        filters = self.filters
+        lo, hi = 0, total
+        if filters['date_from'] is not None or filters['date_to'] is not None:
+            start = self.calendar_data[0]['start_date']
+            if filters['date_from'] is not None:
+                lo = max(lo, (filters['date_from'] - start).days // 7)
+            if filters['date_to'] is not None:
+                hi = min(hi, (filters['date_to'] - start).days // 7 + 1)
+        # Номер недели на единицу больше ее индекса
+        if filters['week_from'] is not None:
+            lo = max(lo, filters['week_from'] - 1)
+        if filters['week_to'] is not None:
+            hi = min(hi, filters['week_to'])
+        if lo >= hi:
+            return range(0)
+        
+        parity = filters['parity']
+        base = range(total) if parity is None else self.parity_index[parity]
+        return base[bisect_left(base, lo):bisect_left(base, hi)]
+    
+    def apply_filters(self):
+        """Применяет фильтр без пересчета календаря и без перестройки таблицы"""
+        try:
+            date_from = self.filter_date_from_var.get().strip()
+            date_to = self.filter_date_to_var.get().strip()
+            week_from = self.filter_week_from_var.get().strip()
+            week_to = self.filter_week_to_var.get().strip()
+            filters = {
+                'parity': self.FILTER_PARITY_VALUES.get(self.filter_parity_var.get()),
+                'date_from': parse_date(date_from) if date_from else None,
+                'date_to': parse_date(date_to) if date_to else None,
+                'week_from': self._parse_week_number(week_from) if week_from else None,
+                'week_to': self._parse_week_number(week_to) if week_to else None,
+            }
+        except ValueError as e:
+            self.status_var.set(f"Ошибка фильтра: {e}")
+            return
+        
+        if all(value is None for value in filters.values()):
+            self.filters = None
+        else:
+            self.filters = filters
+        self.virtual_offset = 0
+        self.refresh_table()
+        self.status_var.set(f"Показано {len(self.display)} из {len(self.calendar_data)} недель")
+    
+    @staticmethod
+    def _parse_week_number(text):
+        if not text.isdigit():
+            raise ValueError(f"Некорректный номер недели: {text!r}")
+        return int(text)
+    
+    def reset_filters(self):
+        """Снимает фильтр"""
+        self.filter_parity_var.set(self.FILTER_PARITY_CHOICES[0])
+        for variable in (self.filter_date_from_var, self.filter_date_to_var,
+                         self.filter_week_from_var, self.filter_week_to_var):
+            variable.set("")
+        self.apply_filters()
+    
+    def _sync_rows(self, rows):
+        """Обновляет строки таблицы по парам (ключ, неделя); прочие удаляет"""
+        seen = set()
+        for key, week in rows:
+            values = (
+                week['week_num'],
+                format_date(week['start_date']),
+                format_date(week['end_date']),
+                week['parity'].upper()
             )
+            tags = ('current',) if week['is_current'] else ()
+            seen.add(key)
             
-        except ValueError:
-            tk.messagebox.showerror("Ошибка", "Пожалуйста, введите корректные числовые значения")
-            self.status_var.set("Ошибка ввода данных")
+            iid = self.row_ids.get(key)
+            if iid is None:
+                self.row_ids[key] = self.tree.insert("", tk.END, values=values, tags=tags)
+            else:
+                old_values, old_tags = self.row_state[key]
+                if values != old_values:
+                    self.tree.item(iid, values=values)
+                if tags != old_tags:
+                    self.tree.item(iid, tags=tags)
+            self.row_state[key] = (values, tags)
+        
+        # Позиции идут подряд с начала - удаляем строки сверх показанных
+        extra = [key for key in self.row_ids if key not in seen]
+        if extra:
+            self.tree.delete(*(self.row_ids.pop(key) for key in extra))
+            for key in extra:
+                del self.row_state[key]
+    
+    def _rows_at(self, indices):
+        """
+        Строки calendar_data для индексов из range одним срезом
+
+        У ленивого CalendarRows срез опрашивает часы один раз на все
+        строки, а обращение по индексу - на каждую.
+        """
+        return self.calendar_data[indices.start:indices.stop:indices.step]
+    
+    def _clear_rows(self):
+        if self.row_ids:
+            self.tree.delete(*self.row_ids.values())
+        self.row_ids.clear()
+        self.row_state.clear()
+    
+    def _set_virtual_offset(self, offset, force=False):
+        """Показывает окно строк, начиная с позиции offset среди показанных недель"""
+        total = len(self.display)
+        offset = max(0, min(offset, total - self.virtual_rows))
+        if offset == self.virtual_offset and not force:
+            return
+        self.virtual_offset = offset
+        
+        stop = min(offset + self.virtual_rows, total)
+        self._sync_rows(enumerate(self._rows_at(self.display[offset:stop])))
+        if total:
+            self.scrollbar.set(offset / total, stop / total)
+    
+    def _on_scrollbar(self, *args):
+        """Команда полосы прокрутки: moveto доля | scroll n units/pages"""
+        if not self.virtual_mode:
+            self.tree.yview(*args)
+            return
+        if args[0] == 'moveto':
+            offset = int(float(args[1]) * len(self.display))
+        else:
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.virtual_rows
+            offset = self.virtual_offset + step
+        self._set_virtual_offset(offset)
+    
+    def _on_tree_scroll(self, first, last):
+        # В виртуальном режиме положение ползунка задает _set_virtual_offset
+        if not self.virtual_mode:
+            self.scrollbar.set(first, last)
+    
+    def _on_mouse_wheel(self, event):
+        if not self.virtual_mode:
+            return None
+        if event.num == 4 or event.delta > 0:
+            step = -3
+        else:
+            step = 3
+        self._set_virtual_offset(self.virtual_offset + step)
+        return "break"
+    
+    def _on_tree_resize(self, event):
+        """Подбирает размер окна под высоту таблицы"""
+        rows = max(1, (event.height - self.HEADER_HEIGHT) // self.ROW_HEIGHT)
+        if rows != self.virtual_rows:
+            self.virtual_rows = rows
+            if self.virtual_mode:
+                self._set_virtual_offset(self.virtual_offset, force=True)
     
     def update_year_info(self, year):
         """Обновляет информацию о выбранном годе"""
@@ -494,26 +1099,28 @@ class AcademicCalendarGUI:
     
     def update_today_info(self):
         """Обновляет информацию о сегодняшнем дне"""
-        today = datetime.date.today()
+        today = self.clock()
 
         try:
             month_names = ["января", "февраля", "марта", "апреля", "мая", "июня",
                           "июля", "августа", "сентября", "октября", "ноября", "декабря"]
             today_str = f"{today.day} {month_names[today.month - 1]} {today.year} года"
         except:
-            today_str = today.strftime("%d.%m.%Y")
+            today_str = format_date(today)
         
         current_week = None
         week_num = None
         parity = None
+        self.current_week_index = None
         
         if self.calendar_data:
-            for week in self.calendar_data:
-                if week['start_date'] <= today <= week['end_date']:
-                    current_week = week
-                    week_num = week['week_num']
-                    parity = week['parity']
-                    break
+            # Недели идут подряд по 7 дней - индекс считаем арифметически
+            index = (today - self.calendar_data[0]['start_date']).days // 7
+            if 0 <= index < len(self.calendar_data):
+                self.current_week_index = index
+                current_week = self.calendar_data[index]
+                week_num = current_week['week_num']
+                parity = current_week['parity']
         
         if current_week:
             parity_display = "ЧЁТНАЯ" if parity == "чётная" else "НЕЧЁТНАЯ"
@@ -524,6 +1131,132 @@ class AcademicCalendarGUI:
             else:
                 self.today_info_text.set(f"{today_str}\n\nСгенерируйте календарь")
     
+    def jump_to_date(self):
+        """
+        Выделяет неделю, содержащую введенную дату
+
+        Принимает ДД.ММ.ГГГГ, ГГГГ-ММ-ДД или ДД.ММ - тогда берется первая
+        такая дата от начала календаря. Неделя находится арифметически
+        от начала первой недели, без прохода по таблице.
+        """
+        if not self.calendar_data:
+            self.status_var.set("Сначала сгенерируйте календарь")
+            return None
+        
+        text = self.jump_var.get().strip()
+        start = self.calendar_data[0]['start_date']
+        try:
+            if text.count('.') == 1:
+                day, month = (int(part) for part in text.split('.'))
+                year = start.year
+                while True:
+                    try:
+                        target = datetime.date(year, month, day)
+                    except ValueError:
+                        # 29 февраля ищем в ближайшем високосном году
+                        if (month, day) != (2, 29) or year - start.year >= 8:
+                            raise
+                        target = None
+                    if target is not None and target >= start:
+                        break
+                    year += 1
+            else:
+                target = parse_date(text)
+        except ValueError:
+            self.status_var.set(f"Некорректная дата: {text}")
+            return None
+        
+        index = (target - start).days // 7
+        if not 0 <= index < len(self.calendar_data):
+            self.status_var.set(f"Дата {format_date(target)} вне диапазона календаря")
+            return None
+        
+        week = self.calendar_data[index]
+        status = f"{format_date(target)}: неделя {week['week_num']}, {week['parity']}"
+        if not self.show_week(index):
+            status += " (скрыта фильтром)"
+        self.status_var.set(status)
+        return index
+    
+    def show_week(self, index):
+        """
+        Прокручивает таблицу к неделе с индексом index и выделяет ее
+
+        Returns:
+            False, если неделя скрыта фильтром
+        """
+        if index not in self.display:
+            return False
+        if self.virtual_mode:
+            # Неделю ставим в середину окна
+            self._set_virtual_offset(self.display.index(index) - self.virtual_rows // 2)
+        key = self._row_key(index)
+        if key is None:
+            return False
+        iid = self.row_ids[key]
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.see(iid)
+        return True
+    
+    def schedule_midnight(self):
+        """Ставит единственный таймер на ближайшую полночь по местному времени"""
+        if self._midnight_job is not None:
+            self.root.after_cancel(self._midnight_job)
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1),
+                                             datetime.time())
+        # Небольшой запас, чтобы часы точно показывали уже новый день
+        delay = int((midnight - now).total_seconds() * 1000) + self.MIDNIGHT_MARGIN_MS
+        self._midnight_job = self.root.after(delay, self._on_midnight)
+    
+    def _on_midnight(self):
+        """Смена дня: обновляет панель "СЕГОДНЯ" и переносит тег текущей недели"""
+        self._midnight_job = None
+        try:
+            old_index = self.current_week_index
+            self.update_today_info()
+            new_index = self.current_week_index
+            
+            if new_index != old_index:
+                # Меняются только две строки - таблица не пересчитывается
+                if old_index is not None:
+                    self._set_current_week(old_index, False)
+                if new_index is not None:
+                    self._set_current_week(new_index, True)
+        finally:
+            # Ошибка обновления не должна отключать смену дня навсегда
+            self.schedule_midnight()
+    
+    def _set_current_week(self, index, is_current):
+        """Ставит или снимает отметку текущей недели у строки с индексом index"""
+        if not 0 <= index < len(self.calendar_data):
+            return
+        if isinstance(self.calendar_data, list):
+            self.calendar_data[index]['is_current'] = is_current
+        
+        key = self._row_key(index)
+        if key is None:
+            return
+        values, _ = self.row_state[key]
+        tags = ('current',) if is_current else ()
+        self.tree.item(self.row_ids[key], tags=tags)
+        self.row_state[key] = (values, tags)
+    
+    def _row_key(self, index):
+        """
+        Ключ строки таблицы (в row_ids) для недели с индексом index
+
+        Returns:
+            None, если неделя скрыта фильтром или вне видимого окна
+        """
+        if index not in self.display:
+            return None
+        key = self.display.index(index)
+        if self.virtual_mode:
+            key -= self.virtual_offset
+        return key if key in self.row_ids else None
+    
     def show_about_info(self):
         """Показывает информацию о программе"""
         
@@ -559,7 +1292,7 @@ class AcademicCalendarGUI:
 Особенности:
 • Автоматическое определение учебного года
 • Генерация календаря с правильной четностью
-• Экспорт в CSV для Excel
+• Экспорт в CSV и XLSX для Excel
 • Компактный интерфейс
 
 Контакты:
@@ -608,8 +1341,38 @@ dev: Zeno
         y = (about_window.winfo_screenwidth() // 2) - (height // 2)
         about_window.geometry(f'{width}x{height}+{x}+{y}')
     
+    def export_rows(self, with_style=False):
+        """
+        Строки экспорта для calendar_data
+
+        Args:
+            with_style: Выдавать пары (строка, стиль XLSX) вместо строк
+        """
+        for week in self.calendar_data:
+            # Преобразуем формат четности (строчные → заглавные)
+            parity_display = week['parity']
+            if parity_display == "нечётная":
+                parity_display = "Нечётная"
+            elif parity_display == "чётная":
+                parity_display = "Чётная"
+            
+            row = [
+                week['week_num'],
+                format_date(week['start_date']),
+                format_date(week['end_date']),
+                parity_display,
+                'Да' if week.get('is_current', False) else 'Нет',
+                'Да' if week.get('contains_sept_1', False) else 'Нет'
+            ]
+            if not with_style:
+                yield row
+            elif week.get('is_current', False):
+                yield row, STYLE_CURRENT
+            else:
+                yield row, STYLE_ODD if week['parity'] == "нечётная" else STYLE_EVEN
+    
     def export_to_csv(self):
-        """Экспорт в CSV (совместимая версия)"""
+        """Экспорт в CSV или XLSX (по расширению выбранного файла)"""
         if not self.calendar_data:
             tk.messagebox.showwarning("Нет данных", "Сначала сгенерируйте календарь")
             return
@@ -630,7 +1393,8 @@ dev: Zeno
             
             filename = tk.filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV файлы", "*.csv"), ("Все файлы", "*.*")],
+                filetypes=[("CSV файлы", "*.csv"), ("Книга Excel", "*.xlsx"),
+                           ("Все файлы", "*.*")],
                 initialdir=initialdir,
                 initialfile=default_filename,
                 title="Сохранить календарь"
@@ -639,47 +1403,31 @@ dev: Zeno
             if not filename:
                 return
             
-            # Убедимся в расширении .csv
-            if not filename.lower().endswith('.csv'):
+            # Убедимся в расширении .csv или .xlsx
+            if not filename.lower().endswith(('.csv', '.xlsx')):
                 filename += '.csv'
             
-            # Сохраняем с кодировкой utf-8-sig для Excel на Windows
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f, delimiter=';')
-                
-                # Заголовок (как в примере)
-                writer.writerow([
-                    'Номер недели',
-                    'Начало недели',
-                    'Конец недели', 
-                    'Четность',
-                    'Текущая неделя',
-                    'Содержит 1 сентября'
-                ])
-                
-                # Данные - адаптируем под текущую структуру
-                for week in self.calendar_data:
-                    # Преобразуем формат четности (строчные → заглавные)
-                    parity_display = week['parity']
-                    if parity_display == "нечётная":
-                        parity_display = "Нечётная"
-                    elif parity_display == "чётная":
-                        parity_display = "Чётная"
-                    
-                    writer.writerow([
-                        week['week_num'],
-                        week['start_date'].strftime("%d.%m.%Y"),
-                        week['end_date'].strftime("%d.%m.%Y"),
-                        parity_display,
-                        'Да' if week.get('is_current', False) else 'Нет',
-                        'Да' if week.get('contains_sept_1', False) else 'Нет'
-                    ])
+            timer = PhaseTimer(enabled=timings_enabled())
+            
+            with timer.phase('запись файла'):
+                if filename.lower().endswith('.xlsx'):
+                    # Книга пишется потоково, с выделением четности и текущей недели
+                    write_xlsx(filename, CSV_HEADER, self.export_rows(with_style=True),
+                               sheet_name=f"{year}-{next_year}",
+                               column_widths=XLSX_COLUMN_WIDTHS)
+                else:
+                    # Сохраняем с кодировкой utf-8-sig для Excel на Windows
+                    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+                        writer = csv.writer(f, delimiter=';')
+                        writer.writerow(CSV_HEADER)
+                        writer.writerows(self.export_rows())
             
             # Возвращаем абсолютный путь
             abs_path = os.path.abspath(filename)
             file_basename = os.path.basename(abs_path)
             
             self.status_var.set(f"✓ Экспортировано: {file_basename}")
+            self.report_timings("Экспорт", timer)
             
             # Успешное сообщение с подробностями
             tk.messagebox.showinfo(
@@ -725,8 +1473,14 @@ dev: Zeno
         """Очистка результатов"""
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.row_ids.clear()
+        self.row_state.clear()
+        self.virtual_mode = False
+        self.virtual_offset = 0
+        self.display = range(0)
         
         self.calendar_data = []
+        self.current_week_index = None
         
         self.info_text.set("Сгенерируйте календарь")
         self.today_info_text.set("Очищено\n\nСгенерируйте календарь")
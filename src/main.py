@@ -10,11 +10,24 @@ import csv
 import os
 import sys
 import argparse
-from typing import List, Optional, Tuple
+import io
+import json
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 
+from config import DEFAULT_SETTINGS
+from xlsx_export import STYLE_CURRENT, STYLE_EVEN, STYLE_ODD, write_xlsx
 
-@dataclass
+
+@dataclass(frozen=True)
 class AcademicWeek:
     """Учебная неделя"""
     number: int
@@ -25,19 +38,488 @@ class AcademicWeek:
     contains_sept_1: bool = False
 
 
+# Часы - функция без аргументов, возвращающая сегодняшнюю дату
+Clock = Callable[[], datetime.date]
+
+PARITY_ODD = "*"
+PARITY_EVEN = "**"
+# Символ четности по биту: 0 - нечётная, 1 - чётная
+PARITY_SYMBOLS = (PARITY_ODD, PARITY_EVEN)
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    Модуль NumPy или None, если он не установлен
+
+    Импорт откладывается до первого векторного вызова: NumPy заметно
+    замедляет запуск GUI и CLI, которым он не нужен.
+    """
+    try:
+        import numpy
+    except ImportError:  # NumPy необязателен
+        return None
+    return numpy
+
+
+# Григорианский календарь повторяется каждые 400 лет: 146097 дней ровно
+# 20871 неделя, поэтому день недели 1 сентября и начало первой учебной
+# недели для года Y получаются сдвигом записи для Y % 400 на целое число циклов
+CYCLE_YEARS = 400
+CYCLE_DAYS = 146097
+_CYCLE_BASE_YEAR = 2000  # кратен 400
+
+
+def _build_cycle_tables() -> Tuple[array, array, array]:
+    """
+    Таблицы цикла для лет _CYCLE_BASE_YEAR + 0..399
+
+    Returns:
+        (ординалы 1 сентября, ординалы начала первой недели,
+         биты четности первой недели) - ординалы от начала цикла
+    """
+    base = (_CYCLE_BASE_YEAR // CYCLE_YEARS) * CYCLE_DAYS
+    sept_1_offsets = array('l')
+    start_offsets = array('l')
+    first_bits = array('b')
+    for offset in range(CYCLE_YEARS):
+        sept_1 = datetime.date(_CYCLE_BASE_YEAR + offset, 9, 1)
+        weekday = sept_1.weekday()
+        if weekday == 6:
+            # 1 сентября - воскресенье: учебный год со 2 сентября, неделя чётная
+            start, first_bit = sept_1.toordinal() + 1, 1
+        else:
+            start, first_bit = sept_1.toordinal() - weekday, 0
+        sept_1_offsets.append(sept_1.toordinal() - base)
+        start_offsets.append(start - base)
+        first_bits.append(first_bit)
+    return sept_1_offsets, start_offsets, first_bits
+
+
+_CYCLE_SEPT_1, _CYCLE_STARTS, _CYCLE_FIRST_BITS = _build_cycle_tables()
+
+
+def _sept_1_ordinal(year: int) -> int:
+    """Ординал 1 сентября года"""
+    cycle, offset = divmod(year, CYCLE_YEARS)
+    return cycle * CYCLE_DAYS + _CYCLE_SEPT_1[offset]
+
+
+def _anchor(academic_year: int) -> Tuple[int, int]:
+    """Ординал начала первой недели и бит её четности"""
+    cycle, offset = divmod(academic_year, CYCLE_YEARS)
+    return cycle * CYCLE_DAYS + _CYCLE_STARTS[offset], _CYCLE_FIRST_BITS[offset]
+
+
+def sept_1_weekday(year: int) -> int:
+    """День недели 1 сентября (0 - понедельник, 6 - воскресенье)"""
+    return (_sept_1_ordinal(year) + 6) % 7
+
+
+def first_week_anchor(academic_year: int) -> Tuple[datetime.date, str]:
+    """
+    Начало первой учебной недели и её четность
+
+    Если 1 сентября - воскресенье, учебный год начинается 2 сентября
+    и первая неделя чётная, иначе - с понедельника недели,
+    содержащей 1 сентября, и первая неделя нечётная.
+
+    Returns:
+        (дата_начала, четность)
+    """
+    start, first_bit = _anchor(academic_year)
+    return datetime.date.fromordinal(start), PARITY_SYMBOLS[first_bit]
+
+
+def _locate(ordinal: int, year: int) -> Tuple[int, int, int]:
+    """
+    Учебный год, номер недели и бит четности для ординала дня
+
+    Args:
+        ordinal: Ординал дня (date.toordinal())
+        year: Календарный год этого дня
+    """
+    start, first_bit = _anchor(year)
+    if ordinal < start:
+        year -= 1
+        start, first_bit = _anchor(year)
+    index = (ordinal - start) // 7
+    return year, index + 1, (first_bit + index) & 1
+
+
+def lookup_week(day: datetime.date) -> Tuple[int, int, str]:
+    """
+    Учебный год, номер недели и четность для произвольной даты
+
+    Вычисляется напрямую от начала первой недели, без генерации
+    списка недель.
+
+    Returns:
+        (учебный_год, номер_недели, четность)
+    """
+    academic_year, week_number, parity_bit = _locate(day.toordinal(), day.year)
+    return academic_year, week_number, PARITY_SYMBOLS[parity_bit]
+
+
+def academic_year_of(day: datetime.date) -> int:
+    """Год начала учебного года, к которому относится дата"""
+    return lookup_week(day)[0]
+
+
+def week_of(day: datetime.date) -> int:
+    """Номер учебной недели, содержащей дату"""
+    return lookup_week(day)[1]
+
+
+def parity_of(day: datetime.date) -> str:
+    """Четность учебной недели, содержащей дату ("*" или "**")"""
+    return lookup_week(day)[2]
+
+
+def parse_date(text: str) -> datetime.date:
+    """Разбор даты в формате ГГГГ-ММ-ДД или ДД.ММ.ГГГГ"""
+    text = text.strip()
+    try:
+        if '.' in text:
+            day, month, year = text.split('.')
+            return datetime.date(int(year), int(month), int(day))
+        return datetime.date.fromisoformat(text)
+    except (ValueError, OverflowError):
+        raise ValueError(f"Некорректная дата: {text!r}") from None
+
+
+# Двузначные строки '00'..'99' для сборки дат без strftime
+_TWO_DIGITS = tuple(f"{i:02d}" for i in range(100))
+
+# Директивы strftime, которые умеет compile_date_format()
+_DATE_DIRECTIVES = {
+    'd': '{_T[d.day]}',
+    'm': '{_T[d.month]}',
+    'Y': '{_T[d.year // 100]}{_T[d.year % 100]}',
+    'y': '{_T[d.year % 100]}',
+    '%': '%',
+}
+
+
+@lru_cache(maxsize=None)
+def compile_date_format(fmt: str) -> Callable[[datetime.date], str]:
+    """
+    Компилирует формат strftime в функцию форматирования даты
+
+    Формат один раз переводится в f-строку с готовыми двузначными
+    числами, что в несколько раз быстрее strftime(). Год всегда
+    выводится четырьмя цифрами (strftime в Linux не дополняет нулями
+    годы до 1000). Форматы с другими директивами (например, %B)
+    форматируются через strftime().
+
+    Args:
+        fmt: Формат, например DEFAULT_SETTINGS['date_format']
+
+    Returns:
+        Функция date -> str
+    """
+    pieces = []
+    i = 0
+    while i < len(fmt):
+        char = fmt[i]
+        if char == '%':
+            directive = _DATE_DIRECTIVES.get(fmt[i + 1:i + 2])
+            if directive is None:
+                return lambda day: day.strftime(fmt)
+            pieces.append(directive)
+            i += 2
+        else:
+            pieces.append(char.replace('{', '{{').replace('}', '}}'))
+            i += 1
+
+    # Литералы экранируются repr(), подстановки - только из таблицы выше
+    source = "lambda d: f" + repr("".join(pieces))
+    return eval(compile(source, f"<date_format {fmt!r}>", 'eval'), {'_T': _TWO_DIGITS})
+
+
+# Форматирование дат для таблиц и экспорта по настройке date_format
+format_date = compile_date_format(DEFAULT_SETTINGS['date_format'])
+
+
+class WeekTable(Sequence):
+    """
+    Календарь в столбцовом виде
+
+    Хранит параллельные массивы (ординал начала недели, бит четности,
+    флаги) вместо объекта на каждую неделю. Объекты AcademicWeek
+    создаются только при обращении к конкретной неделе.
+
+    Таблица неизменяема после построения, поэтому один экземпляр можно
+    безопасно отдавать нескольким потокам и хранить в кэше. Текущая
+    неделя не хранится, а вычисляется при обращении по часам clock,
+    поэтому таблица не устаревает со сменой дня.
+    """
+
+    __slots__ = ('_academic_year', '_start_ordinals', '_parity_bits', '_flags', '_clock')
+
+    FLAG_SEPT_1 = 1
+
+    def __init__(self, academic_year: int, start_ordinals: array,
+                 parity_bits: array, flags: array, clock: Optional[Clock] = None):
+        self._academic_year = academic_year
+        self._start_ordinals = start_ordinals
+        self._parity_bits = parity_bits
+        self._flags = flags
+        self._clock = clock
+
+    @property
+    def academic_year(self) -> int:
+        return self._academic_year
+
+    @property
+    def start_ordinals(self) -> memoryview:
+        """Ординалы начала недель (только чтение)"""
+        return memoryview(self._start_ordinals).toreadonly()
+
+    @property
+    def parity_bits(self) -> memoryview:
+        """Биты четности: 0 - нечётная, 1 - чётная (только чтение)"""
+        return memoryview(self._parity_bits).toreadonly()
+
+    @property
+    def flags(self) -> memoryview:
+        """Флаги FLAG_SEPT_1 (только чтение)"""
+        return memoryview(self._flags).toreadonly()
+
+    @property
+    def clock(self) -> Clock:
+        """Часы, по которым определяется текущая неделя"""
+        return self._clock or datetime.date.today
+
+    def with_clock(self, clock: Optional[Clock]) -> "WeekTable":
+        """Та же таблица (без копирования столбцов) с другими часами"""
+        return WeekTable(self._academic_year, self._start_ordinals,
+                         self._parity_bits, self._flags, clock)
+
+    @classmethod
+    def build(cls, academic_year: int, total_weeks: int,
+              clock: Optional[Clock] = None) -> "WeekTable":
+        """
+        Строит таблицу недель без создания объектов на каждую неделю
+
+        Args:
+            academic_year: Год начала учебного года
+            total_weeks: Общее количество недель
+            clock: Часы для определения текущей недели
+                (по умолчанию - datetime.date.today)
+        """
+        total_weeks = max(total_weeks, 0)
+        if academic_year < datetime.MINYEAR:
+            raise ValueError(f"Календарь не может начинаться раньше {datetime.MINYEAR} года")
+        start, first_bit = _anchor(academic_year)
+        if start + 7 * total_weeks - 1 > datetime.date.max.toordinal():
+            raise ValueError(f"Календарь из {total_weeks} недель выходит "
+                             f"за пределы {datetime.MAXYEAR} года")
+
+        start_ordinals = array('l', range(start, start + 7 * total_weeks, 7))
+        parity_bits = array('b', (first_bit, 1 - first_bit)) * ((total_weeks + 1) // 2)
+        del parity_bits[total_weeks:]
+        flags = array('b', bytes(total_weeks))
+
+        table = cls(academic_year, start_ordinals, parity_bits, flags, clock)
+        sept_1_index = table._index_of_ordinal(_sept_1_ordinal(academic_year))
+        if sept_1_index is not None:
+            flags[sept_1_index] |= cls.FLAG_SEPT_1
+        return table
+
+    def __len__(self) -> int:
+        return len(self._start_ordinals)
+
+    def _week(self, index: int, current: Optional[int]) -> AcademicWeek:
+        start = self._start_ordinals[index]
+        return AcademicWeek(
+            number=index + 1,
+            start_date=datetime.date.fromordinal(start),
+            end_date=datetime.date.fromordinal(start + 6),
+            parity=PARITY_SYMBOLS[self._parity_bits[index]],
+            is_current=index == current,
+            contains_sept_1=bool(self._flags[index] & self.FLAG_SEPT_1)
+        )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[AcademicWeek, List[AcademicWeek]]:
+        # Часы опрашиваются один раз на обращение, а не на каждую неделю
+        current = self.current_index()
+        if isinstance(index, slice):
+            return [self._week(i, current) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("номер недели вне диапазона календаря")
+        return self._week(index, current)
+
+    def __iter__(self) -> Iterator[AcademicWeek]:
+        current = self.current_index()
+        for index in range(len(self)):
+            yield self._week(index, current)
+
+    def current_index(self, today: Optional[datetime.date] = None) -> Optional[int]:
+        """Индекс текущей недели (по часам таблицы или дате today) или None"""
+        if today is None:
+            today = self.clock()
+        return self._index_of_ordinal(today.toordinal())
+
+    def index_of(self, day: datetime.date) -> Optional[int]:
+        """Индекс недели, содержащей дату, или None"""
+        return self._index_of_ordinal(day.toordinal())
+
+    def _index_of_ordinal(self, ordinal: int) -> Optional[int]:
+        if not self._start_ordinals:
+            return None
+        index = (ordinal - self._start_ordinals[0]) // 7
+        if 0 <= index < len(self):
+            return index
+        return None
+
+    def count_parity(self, parity: str) -> int:
+        """Количество недель с заданной четностью"""
+        return self._parity_bits.count(PARITY_SYMBOLS.index(parity))
+
+    def to_numpy(self) -> Dict[str, "np.ndarray"]:
+        """
+        Столбцы таблицы как массивы NumPy только для чтения (без копирования)
+
+        Raises:
+            ImportError: NumPy не установлен
+        """
+        np = _numpy()
+        if np is None:
+            raise ImportError("Для to_numpy() требуется NumPy")
+        return {
+            'start_ordinals': np.frombuffer(
+                self.start_ordinals, dtype=f"i{self._start_ordinals.itemsize}"),
+            'parity_bits': np.frombuffer(self.parity_bits, dtype=np.int8),
+            'flags': np.frombuffer(self.flags, dtype=np.int8),
+        }
+
+
+# Правила построения календаря входят в ключ кэша: при их изменении
+# старые записи не будут использованы
+CALENDAR_RULES = "gost-sept1-sunday-shift/v1"
+
+
+class CalendarCache:
+    """
+    Общий для процесса потокобезопасный LRU-кэш календарей
+
+    Ключ - (учебный год, количество недель, правила). Таблицы не зависят
+    от текущей даты, поэтому не устаревают в полночь. Если несколько
+    потоков одновременно запрашивают отсутствующий календарь, он
+    строится один раз, остальные ждут результата.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, WeekTable]" = OrderedDict()
+        self._pending: Dict[tuple, Future] = {}
+
+    def get(self, academic_year: int, total_weeks: int = 52) -> WeekTable:
+        """Календарь из кэша или построенный (один раз на ключ)"""
+        key = (academic_year, total_weeks, CALENDAR_RULES)
+
+        with self._lock:
+            table = self._entries.get(key)
+            if table is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return table
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+                self.misses += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            table = WeekTable.build(academic_year, total_weeks)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = table
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            del self._pending[key]
+        future.set_result(table)
+        return table
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+CALENDAR_CACHE = CalendarCache()
+
+
+def get_calendar(academic_year: int, total_weeks: int = 52,
+                 clock: Optional[Clock] = None) -> WeekTable:
+    """
+    Календарь из общего кэша процесса
+
+    Args:
+        clock: Часы для определения текущей недели
+            (по умолчанию - datetime.date.today)
+    """
+    table = CALENDAR_CACHE.get(academic_year, total_weeks)
+    return table.with_clock(clock) if clock is not None else table
+
+
+CSV_HEADER = [
+    'Номер недели',
+    'Начало недели',
+    'Конец недели', 
+    'Четность',
+    'Текущая неделя',
+    'Содержит 1 сентября'
+]
+
+# Ширины столбцов XLSX (в символах) для CSV_HEADER
+XLSX_COLUMN_WIDTHS = [14, 16, 16, 10, 16, 20]
+
+
 class UniversityCalendar:
     """Генератор календаря для университета"""
     
-    def __init__(self, academic_year: int):
+    def __init__(self, academic_year: int, clock: Optional[Clock] = None):
         """
         Инициализация
         
         Args:
             academic_year: Год начала учебного года (напр., 2026)
+            clock: Часы для определения текущей недели
+                (по умолчанию - datetime.date.today)
         """
         self.academic_year = academic_year
-        self.weeks: List[AcademicWeek] = []
-        self.today = datetime.date.today()
+        self.clock = clock
+        self.weeks = WeekTable.build(academic_year, 0, clock)
+
+    @property
+    def today(self) -> datetime.date:
+        """Сегодняшняя дата по часам календаря"""
+        return (self.clock or datetime.date.today)()
+
+    @today.setter
+    def today(self, day: datetime.date) -> None:
+        """Фиксирует дату (часы всегда возвращают day)"""
+        self.clock = lambda: day
+        self.weeks = self.weeks.with_clock(self.clock)
         
     def find_first_academic_week(self) -> Tuple[datetime.date, str]:
         """
@@ -46,22 +528,19 @@ class UniversityCalendar:
         Returns:
             (дата_начала, примечание)
         """
-        sept_1 = datetime.date(self.academic_year, 9, 1)
-
         weekday_names = ["понедельник", "вторник", "среда", 
                         "четверг", "пятница", "суббота", "воскресенье"]
-        weekday_name = weekday_names[sept_1.weekday()]
+        weekday = sept_1_weekday(self.academic_year)
+        start_date, _ = first_week_anchor(self.academic_year)
 
-        if sept_1.weekday() == 6:
-            start_date = sept_1 + timedelta(days=1)
+        if weekday == 6:
             note = f"1 сентября - воскресенье, уч. год начинается 2 сентября"
         else:
-            start_date = sept_1 - timedelta(days=sept_1.weekday())
-            note = f"1 сентября - {weekday_name}"
+            note = f"1 сентября - {weekday_names[weekday]}"
         
         return start_date, note
     
-    def generate(self, total_weeks: int = 52) -> List[AcademicWeek]:
+    def generate(self, total_weeks: int = 52) -> WeekTable:
         """
         Генерирует календарь
 
@@ -69,43 +548,84 @@ class UniversityCalendar:
             total_weeks: Общее количество недель
 
         Returns:
-            Список учебных недель
+            Неизменяемая таблица учебных недель (общая с кэшем)
+        """
+        self.weeks = get_calendar(self.academic_year, total_weeks, self.clock)
+        return self.weeks
+
+    def _last_week_number(self) -> int:
+        """Номер последней недели, целиком помещающейся в диапазон datetime.date"""
+        first_start, _ = _anchor(self.academic_year)
+        return (datetime.date.max.toordinal() - 6 - first_start) // 7 + 1
+
+    def iter_weeks(self, start: int = 1, stop: Optional[int] = None) -> Iterator[AcademicWeek]:
         """
-        self.weeks.clear()
+        Лениво выдает недели с номерами start..stop-1, не сохраняя их
 
-        start_date, first_week_note = self.find_first_academic_week()
+        Args:
+            start: Номер первой недели
+            stop: Номер недели, на которой остановиться (не включая);
+                None - до конца диапазона дат datetime.date
 
-        sept_1 = datetime.date(self.academic_year, 9, 1)
+        Yields:
+            Учебные недели по порядку
+        """
+        first_start, first_bit = _anchor(self.academic_year)
+        last_week = self._last_week_number()
+        stop = last_week + 1 if stop is None else min(stop, last_week + 1)
 
-        if sept_1.weekday() == 6:
-            first_week_parity = "**"
-        else:
-            first_week_parity = "*"
-
-        current_parity = first_week_parity
-
-        for week_num in range(1, total_weeks + 1):
-            end_date = start_date + timedelta(days=6)
-            parity = current_parity
-            is_current = start_date <= self.today <= end_date
-            contains_sept_1 = start_date <= sept_1 <= end_date
-            week = AcademicWeek(
-                number=week_num,
-                start_date=start_date,
-                end_date=end_date,
-                parity=parity,
-                is_current=is_current,
-                contains_sept_1=contains_sept_1
+        today = self.today.toordinal()
+        sept_1 = _sept_1_ordinal(self.academic_year)
+        fromordinal = datetime.date.fromordinal
+
+        for number in range(max(start, 1), stop):
+            week_start = first_start + 7 * (number - 1)
+            week_end = week_start + 6
+            yield AcademicWeek(
+                number=number,
+                start_date=fromordinal(week_start),
+                end_date=fromordinal(week_end),
+                parity=PARITY_SYMBOLS[(first_bit + number - 1) & 1],
+                is_current=week_start <= today <= week_end,
+                contains_sept_1=week_start <= sept_1 <= week_end
             )
 
-            self.weeks.append(week)
-            start_date += timedelta(days=7)
-            current_parity = "**" if current_parity == "*" else "*"
-    
-        return self.weeks
+    def summarize(self, total_weeks: int) -> dict:
+        """
+        Статистика по календарю из total_weeks недель без его генерации
+
+        Returns:
+            Словарь того же вида, что и get_statistics()
+        """
+        total = max(min(total_weeks, self._last_week_number()), 0)
+        if not total:
+            return {}
+
+        first_start, first_bit = _anchor(self.academic_year)
+        odd = (total + 1 - first_bit) // 2
+        current_index = (self.today.toordinal() - first_start) // 7
+
+        return {
+            'total_weeks': total,
+            'odd_weeks': odd,
+            'even_weeks': total - odd,
+            'start_date': datetime.date.fromordinal(first_start),
+            'end_date': datetime.date.fromordinal(first_start + 7 * total - 1),
+            'current_week': current_index + 1 if 0 <= current_index < total else None
+        }
     
-    def print_table(self, show_notes: bool = False) -> None:
-        """Вывод таблицы в консоль"""
+    def print_table(self, show_notes: bool = False,
+                    weeks: Optional[Iterable[AcademicWeek]] = None) -> None:
+        """
+        Вывод таблицы в консоль
+
+        Args:
+            show_notes: Показывать примечания
+            weeks: Недели для вывода (по умолчанию - сгенерированные),
+                например, iter_weeks() для потокового вывода
+        """
+        if weeks is None:
+            weeks = self.weeks
         
         print("\n" + "="*70)
         print(f"УЧЕБНЫЙ КАЛЕНДАРЬ {self.academic_year}-{self.academic_year + 1}")
@@ -122,9 +642,9 @@ class UniversityCalendar:
         print(header)
         print("-"*70)
 
-        for week in self.weeks:
-            start_str = week.start_date.strftime("%d.%m.%Y")
-            end_str = week.end_date.strftime("%d.%m.%Y")
+        for week in weeks:
+            start_str = format_date(week.start_date)
+            end_str = format_date(week.end_date)
 
             week_num_str = f"{week.number}"
             if week.is_current:
@@ -143,46 +663,88 @@ class UniversityCalendar:
             
             print(row)
     
-    def export_csv(self, filename: str = None) -> str:
+    def export_csv(self, filename: str = None,
+                   weeks: Optional[Iterable[AcademicWeek]] = None) -> str:
         """
         Экспорт в CSV
-        
+
+        Args:
+            filename: Имя файла
+            weeks: Недели для экспорта (по умолчанию - сгенерированные),
+                например, iter_weeks() для потоковой записи
+
         Returns:
             Путь к созданному файлу
         """
+        if weeks is None:
+            weeks = self.weeks
         if not filename:
             filename = f"university_calendar_{self.academic_year}_{self.academic_year+1}.csv"
         
         with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.writer(f, delimiter=';')
-
-            writer.writerow([
-                'Номер недели',
-                'Начало недели',
-                'Конец недели', 
-                'Четность',
-                'Текущая неделя',
-                'Содержит 1 сентября'
-            ])
-
-            for week in self.weeks:
-                writer.writerow([
-                    week.number,
-                    week.start_date.strftime("%d.%m.%Y"),
-                    week.end_date.strftime("%d.%m.%Y"),
-                    week.parity,
-                    'Да' if week.is_current else 'Нет',
-                    'Да' if week.contains_sept_1 else 'Нет'
-                ])
+            writer.writerow(CSV_HEADER)
+            writer.writerows(self.csv_rows(weeks))
         
         return os.path.abspath(filename)
     
+    def csv_rows(self, weeks: Optional[Iterable[AcademicWeek]] = None) -> Iterator[list]:
+        """Строки CSV (без заголовка) для недель календаря"""
+        if weeks is None:
+            weeks = self.weeks
+        for week in weeks:
+            yield self._week_row(week)
+    
+    @staticmethod
+    def _week_row(week: AcademicWeek) -> list:
+        """Значения столбцов CSV_HEADER для недели"""
+        return [
+            week.number,
+            format_date(week.start_date),
+            format_date(week.end_date),
+            week.parity,
+            'Да' if week.is_current else 'Нет',
+            'Да' if week.contains_sept_1 else 'Нет'
+        ]
+    
+    def export_xlsx(self, filename: str = None,
+                    weeks: Optional[Iterable[AcademicWeek]] = None) -> str:
+        """
+        Экспорт в XLSX с выделением четности и текущей недели
+
+        Книга пишется потоково, память не зависит от числа недель.
+
+        Args:
+            filename: Имя файла
+            weeks: Недели для экспорта (по умолчанию - сгенерированные),
+                например, iter_weeks() для потоковой записи
+
+        Returns:
+            Путь к созданному файлу
+        """
+        if not filename:
+            filename = f"university_calendar_{self.academic_year}_{self.academic_year+1}.xlsx"
+        return write_xlsx(filename, CSV_HEADER, self.xlsx_rows(weeks),
+                          sheet_name=f"{self.academic_year}-{self.academic_year + 1}",
+                          column_widths=XLSX_COLUMN_WIDTHS)
+    
+    def xlsx_rows(self, weeks: Optional[Iterable[AcademicWeek]] = None) -> Iterator[tuple]:
+        """Строки XLSX (значения и стиль) для недель календаря"""
+        for week in self.weeks if weeks is None else weeks:
+            if week.is_current:
+                style = STYLE_CURRENT
+            elif week.parity == PARITY_ODD:
+                style = STYLE_ODD
+            else:
+                style = STYLE_EVEN
+            yield self._week_row(week), style
+    
     def get_current_week(self) -> Optional[AcademicWeek]:
         """Получить текущую неделю"""
-        for week in self.weeks:
-            if week.is_current:
-                return week
-        return None
+        index = self.weeks.current_index()
+        if index is None:
+            return None
+        return self.weeks[index]
     
     def get_statistics(self) -> dict:
         """Статистика по календарю"""
@@ -190,7 +752,7 @@ class UniversityCalendar:
             return {}
         
         total = len(self.weeks)
-        odd = sum(1 for w in self.weeks if w.parity == "*")
+        odd = self.weeks.count_parity(PARITY_ODD)
         even = total - odd
         current = self.get_current_week()
         
@@ -204,6 +766,75 @@ class UniversityCalendar:
         }
 
 
+class BatchLookup(NamedTuple):
+    """Результат пакетного определения четности (столбцы одинаковой длины)"""
+    academic_years: Sequence
+    week_numbers: Sequence
+    parity_bits: Sequence
+
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _anchors_numpy(years: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Дни (от 1970-01-01) начала первых недель и биты их четности"""
+    np = _numpy()
+    cycles, offsets = np.divmod(years, CYCLE_YEARS)
+    starts = np.frombuffer(_CYCLE_STARTS, dtype=f"i{_CYCLE_STARTS.itemsize}")
+    first_bits = np.frombuffer(_CYCLE_FIRST_BITS, dtype=np.int8)
+    start = cycles * CYCLE_DAYS + starts[offsets] - _EPOCH_ORDINAL
+    return start, first_bits[offsets].astype(np.int64)
+
+
+def _batch_lookup_numpy(days) -> BatchLookup:
+    np = _numpy()
+    days = np.asarray(days, dtype='datetime64[D]')
+    day_numbers = days.astype(np.int64)
+    years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+
+    start, first_bit = _anchors_numpy(years)
+    before = day_numbers < start
+    if before.any():
+        years = years - before
+        previous_start, previous_bit = _anchors_numpy(years)
+        start = np.where(before, previous_start, start)
+        first_bit = np.where(before, previous_bit, first_bit)
+
+    index = (day_numbers - start) // 7
+    return BatchLookup(years, index + 1, ((first_bit + index) & 1).astype(np.int8))
+
+
+def _batch_lookup_python(days: Iterable[datetime.date]) -> BatchLookup:
+    years = array('l')
+    week_numbers = array('l')
+    parity_bits = array('b')
+    for day in days:
+        academic_year, week_number, parity_bit = _locate(day.toordinal(), day.year)
+        years.append(academic_year)
+        week_numbers.append(week_number)
+        parity_bits.append(parity_bit)
+    return BatchLookup(years, week_numbers, parity_bits)
+
+
+def batch_lookup(days) -> BatchLookup:
+    """
+    Пакетное определение учебного года, номера недели и четности
+
+    С NumPy вычисляется векторно (вход - массив datetime64[D] или
+    последовательность дат), результат - массивы NumPy. Без NumPy
+    даты обрабатываются в цикле, результат - массивы array.
+
+    Args:
+        days: Массив datetime64[D] или последовательность datetime.date
+
+    Returns:
+        BatchLookup; бит четности 0 - нечётная ("*"), 1 - чётная ("**")
+    """
+    if _numpy() is not None:
+        return _batch_lookup_numpy(days)
+    return _batch_lookup_python(days)
+
+
 def analyze_year(year: int) -> None:
     """Анализ структуры учебного года"""
     
@@ -211,42 +842,455 @@ def analyze_year(year: int) -> None:
     print(f"АНАЛИЗ УЧЕБНОГО ГОДА {year}-{year+1}")
     print(f"{'='*60}")
     
-    sept_1 = datetime.date(year, 9, 1)
     weekdays = ["понедельник", "вторник", "среда", 
                 "четверг", "пятница", "суббота", "воскресенье"]
     
-    weekday_num = sept_1.weekday()
+    weekday_num = sept_1_weekday(year)
     weekday_name = weekdays[weekday_num]
+    start_date, _ = first_week_anchor(year)
     
     print(f"📅 1 сентября {year} года: {weekday_name}")
     
     if weekday_num == 6:  # Воскресенье
-        start_date = sept_1 + timedelta(days=1)
         print("⚠️  1 сентября - воскресенье")
-        print(f"✅ Учебный год начинается: {start_date.strftime('%d.%m.%Y')}")
-        print(f"✅ Первая учебная неделя: {start_date.strftime('%d.%m.%Y')} - "
-              f"{(start_date + timedelta(days=6)).strftime('%d.%m.%Y')}")
+        print(f"✅ Учебный год начинается: {format_date(start_date)}")
+        print(f"✅ Первая учебная неделя: {format_date(start_date)} - "
+              f"{format_date(start_date + timedelta(days=6))}")
     else:
-        start_date = sept_1 - timedelta(days=weekday_num)
-        print(f"✅ Первая учебная неделя: {start_date.strftime('%d.%m.%Y')} - "
-              f"{(start_date + timedelta(days=6)).strftime('%d.%m.%Y')}")
+        print(f"✅ Первая учебная неделя: {format_date(start_date)} - "
+              f"{format_date(start_date + timedelta(days=6))}")
 
     print(f"\nСравнение с соседними годами:")
     for y in [year-1, year, year+1]:
-        s1 = datetime.date(y, 9, 1)
-        wd_name = weekdays[s1.weekday()]
+        wd_name = weekdays[sept_1_weekday(y)]
         marker = "←" if y == year else ""
         print(f"  {y}-{y+1}: 1 сентября - {wd_name} {marker}")
 
 
 def validate_year(year: int) -> bool:
     """Проверка корректности года"""
-    current_year = datetime.date.today().year
-    return 2000 <= year <= current_year + 20
+    return datetime.MINYEAR <= year <= datetime.MAXYEAR
+
+
+def parse_years(text: str) -> List[int]:
+    """Разбор списка лет вида "2026", "2000-2100" или "2020,2022,2024-2026" """
+    years = []
+    for part in text.split(','):
+        first, _, last = part.strip().partition('-')
+        try:
+            first_year = int(first)
+            last_year = int(last) if last else first_year
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"некорректный год или диапазон: {part}")
+        years.extend(range(first_year, last_year + 1))
+    if not years:
+        raise argparse.ArgumentTypeError(f"пустой диапазон лет: {text}")
+    return sorted(set(years))
+
+
+def parse_year_range(text: str) -> Tuple[int, int]:
+    """Разбор диапазона лет вида "1900-2200" (или одного года)"""
+    first, _, last = text.partition('-')
+    try:
+        first_year = int(first)
+        last_year = int(last) if last else first_year
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"некорректный диапазон лет: {text}")
+    if not (validate_year(first_year) and validate_year(last_year)) or first_year > last_year:
+        raise argparse.ArgumentTypeError(
+            f"диапазон должен лежать в пределах {datetime.MINYEAR}-{datetime.MAXYEAR}: {text}")
+    return first_year, last_year
+
+
+# HTTP-сервис четности
+API_MAX_WEEKS = 10000
+API_MAX_BODY = 64 * 1024 * 1024
+
+HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+def _json_bytes(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _parity_payload(day: datetime.date, academic_year: int,
+                    week_number: int, parity: str) -> dict:
+    return {
+        'date': day.isoformat(),
+        'academic_year': academic_year,
+        'week': week_number,
+        'parity': parity,
+    }
+
+
+@lru_cache(maxsize=64)
+def _calendar_weeks_json(academic_year: int, total_weeks: int) -> bytes:
+    """JSON-массив недель календаря (кэшируется по году и числу недель)"""
+    table = get_calendar(academic_year, total_weeks)
+    return _json_bytes([
+        {
+            'number': week.number,
+            'start_date': week.start_date.isoformat(),
+            'end_date': week.end_date.isoformat(),
+            'parity': week.parity,
+            'contains_sept_1': week.contains_sept_1,
+        }
+        for week in table
+    ])
+
+
+def _calendar_response(academic_year: int, total_weeks: int) -> bytes:
+    weeks_json = _calendar_weeks_json(academic_year, total_weeks)
+    # Текущая неделя зависит от даты запроса, поэтому в кэш не попадает
+    index = get_calendar(academic_year, total_weeks).current_index()
+    current_week = index + 1 if index is not None else None
+    head = _json_bytes({'academic_year': academic_year, 'current_week': current_week})
+    return head[:-1] + b',"weeks":' + weeks_json + b'}'
+
+
+def handle_api_request(method: str, target: str, body: bytes = b'') -> Tuple[int, bytes]:
+    """
+    Обработка запроса к API четности
+
+    GET /parity?date=ГГГГ-ММ-ДД, GET /calendar/{год}?weeks=N,
+    POST /parity/batch с JSON-массивом дат.
+
+    Returns:
+        (HTTP-статус, тело ответа в JSON)
+    """
+    import urllib.parse
+
+    url = urllib.parse.urlsplit(target)
+    path = url.path.rstrip('/')
+    query = urllib.parse.parse_qs(url.query)
+
+    try:
+        if path == '/parity':
+            if method != 'GET':
+                return 405, _json_bytes({'error': 'Разрешен только GET'})
+            if 'date' not in query:
+                raise ValueError("Не указан параметр date")
+            day = parse_date(query['date'][0])
+            return 200, _json_bytes(_parity_payload(day, *lookup_week(day)))
+
+        if path == '/parity/batch':
+            if method != 'POST':
+                return 405, _json_bytes({'error': 'Разрешен только POST'})
+            try:
+                items = json.loads(body)
+            except ValueError:
+                raise ValueError("Тело запроса должно быть JSON-массивом дат") from None
+            if not isinstance(items, list) or not all(isinstance(i, str) for i in items):
+                raise ValueError("Тело запроса должно быть JSON-массивом дат")
+            days = [parse_date(item) for item in items]
+            result = batch_lookup(days)
+            return 200, _json_bytes([
+                _parity_payload(day, academic_year, week_number, PARITY_SYMBOLS[bit])
+                for day, academic_year, week_number, bit in zip(
+                    days, result.academic_years.tolist(),
+                    result.week_numbers.tolist(), result.parity_bits.tolist())
+            ])
+
+        if path.startswith('/calendar/'):
+            if method != 'GET':
+                return 405, _json_bytes({'error': 'Разрешен только GET'})
+            try:
+                academic_year = int(path[len('/calendar/'):])
+                total_weeks = int(query.get('weeks', ['52'])[0])
+            except ValueError:
+                raise ValueError("Год и количество недель должны быть целыми числами") from None
+            if not validate_year(academic_year):
+                raise ValueError(f"Год должен быть между {datetime.MINYEAR} и {datetime.MAXYEAR}")
+            if not 1 <= total_weeks <= API_MAX_WEEKS:
+                raise ValueError(f"Количество недель должно быть от 1 до {API_MAX_WEEKS}")
+            return 200, _calendar_response(academic_year, total_weeks)
+
+    except ValueError as e:
+        return 400, _json_bytes({'error': str(e)})
+
+    return 404, _json_bytes({'error': f"Неизвестный адрес: {url.path}"})
+
+
+async def _handle_connection(reader: "asyncio.StreamReader",
+                             writer: "asyncio.StreamWriter") -> None:
+    """Обслуживание одного соединения (HTTP/1.1 с keep-alive)"""
+    import asyncio
+
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if 0 <= length <= API_MAX_BODY:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = handle_api_request(method, target, body)
+                except Exception as e:
+                    # Ошибка обработчика не должна обрывать соединение без ответа
+                    status, payload = 500, _json_bytes({'error': f"Внутренняя ошибка: {e}"})
+                keep_alive = (status != 500 and version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+            else:
+                status, payload = 413, _json_bytes({'error': 'Некорректный размер тела запроса'})
+                keep_alive = False
+
+            writer.write(
+                f"{version if version.startswith('HTTP/') else 'HTTP/1.1'} "
+                f"{status} {HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                f"\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8080) -> None:
+    """Запуск HTTP-сервиса четности (работает до прерывания)"""
+    import asyncio
+
+    server = await asyncio.start_server(_handle_connection, host, port)
+    print(f"🌐 Сервис четности запущен: http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+# Потоковая разметка дат (stdin -> stdout)
+PIPE_CACHE_SIZE = 4096
+
+
+def annotate_stream(source, target, date_field: str = 'date',
+                    separator: str = DEFAULT_SETTINGS['csv_separator']) -> int:
+    """
+    Размечает даты из потока учебным годом, номером недели и четностью
+
+    Строка-дата (ГГГГ-ММ-ДД или ДД.ММ.ГГГГ) дополняется полями через
+    separator; NDJSON-объект получает ключи academic_year, week, parity
+    по значению поля date_field. Строки обрабатываются по одной, память
+    не растет с длиной потока.
+
+    Args:
+        source: Входной бинарный поток
+        target: Выходной бинарный поток
+
+    Returns:
+        Количество обработанных строк
+    """
+    cache = {}
+    count = 0
+    for count, raw in enumerate(source, 1):
+        # Битые байты заменяются на U+FFFD, чтобы одна строка не останавливала поток
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        text = line.strip()
+        if not text:
+            target.write(b'\n')
+            continue
+
+        if text.startswith('{'):
+            record = None
+            try:
+                record = json.loads(text)
+                if date_field not in record:
+                    raise ValueError(f"нет поля {date_field!r}")
+                day = parse_date(str(record[date_field]))
+                academic_year, week_number, parity = lookup_week(day)
+                record['academic_year'] = academic_year
+                record['week'] = week_number
+                record['parity'] = parity
+            except (ValueError, OverflowError) as e:
+                if not isinstance(record, dict):
+                    record = {'line': line}
+                record['error'] = f"строка {count}: {e}"
+            target.write(_json_bytes(record) + b'\n')
+            continue
+
+        suffix = cache.get(text)
+        if suffix is None:
+            try:
+                academic_year, week_number, parity = lookup_week(parse_date(text))
+                suffix = f"{separator}{academic_year}{separator}{week_number}{separator}{parity}\n"
+            except (ValueError, OverflowError) as e:
+                print(f"⚠️  Строка {count}: {e}", file=sys.stderr)
+                suffix = f"{separator}{separator}{separator}\n"
+            if len(cache) >= PIPE_CACHE_SIZE:
+                cache.clear()
+            cache[text] = suffix
+        target.write((line + suffix).encode('utf-8'))
+    return count
+
+
+# Генерация нескольких учебных лет
+def _render_year_csv(academic_year: int, total_weeks: int, with_year: bool) -> str:
+    """CSV-строки календаря одного года (выполняется в рабочем процессе)"""
+    calendar = UniversityCalendar(academic_year)
+    calendar.generate(total_weeks)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    for row in calendar.csv_rows():
+        writer.writerow([academic_year] + row if with_year else row)
+    return buffer.getvalue()
+
+
+def _export_year_xlsx(academic_year: int, total_weeks: int, filename: str) -> str:
+    """XLSX-файл календаря одного года (выполняется в рабочем процессе)"""
+    calendar = UniversityCalendar(academic_year)
+    calendar.generate(total_weeks)
+    return calendar.export_xlsx(filename)
+
+
+def _merged_xlsx_rows(years: List[int], total_weeks: int) -> Iterator[tuple]:
+    for academic_year in years:
+        calendar = UniversityCalendar(academic_year)
+        calendar.generate(total_weeks)
+        for values, style in calendar.xlsx_rows():
+            yield [academic_year] + values, style
+
+
+def export_years(years: List[int], total_weeks: int,
+                 output_dir: str = DEFAULT_SETTINGS['output_dir'],
+                 merge: bool = False, jobs: Optional[int] = None,
+                 fmt: str = 'csv') -> List[str]:
+    """
+    Генерирует и экспортирует календари нескольких учебных лет
+
+    Календари строятся параллельно в процессах, файлы записываются
+    по порядку лет.
+
+    Args:
+        years: Годы начала учебных лет
+        total_weeks: Количество недель в каждом календаре
+        output_dir: Папка для файлов
+        merge: Один общий файл со столбцом "Учебный год" вместо файла на год
+        jobs: Количество процессов (по умолчанию - число ядер)
+        fmt: Формат файлов: 'csv' или 'xlsx'
+
+    Returns:
+        Пути к созданным файлам
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = len(years)
+
+    if fmt == 'xlsx':
+        if merge:
+            # Общая книга пишется потоково по годам в одном процессе
+            filename = os.path.join(
+                output_dir, f"university_calendar_{years[0]}_{years[-1] + 1}.xlsx")
+            return [write_xlsx(filename, ['Учебный год'] + CSV_HEADER,
+                               _merged_xlsx_rows(years, total_weeks),
+                               sheet_name=f"{years[0]}-{years[-1] + 1}",
+                               column_widths=[12] + XLSX_COLUMN_WIDTHS)]
+        filenames = [os.path.join(output_dir, f"university_calendar_{y}_{y + 1}.xlsx")
+                     for y in years]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_export_year_xlsx, years, [total_weeks] * count,
+                                     filenames, chunksize=max(1, count // 64)))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunks = executor.map(_render_year_csv, years, [total_weeks] * count,
+                              [merge] * count, chunksize=max(1, count // 64))
+
+        if merge:
+            filename = os.path.join(
+                output_dir, f"university_calendar_{years[0]}_{years[-1] + 1}.csv")
+            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+                csv.writer(f, delimiter=';').writerow(['Учебный год'] + CSV_HEADER)
+                for chunk in chunks:
+                    f.write(chunk)
+            return [os.path.abspath(filename)]
+
+        paths = []
+        for academic_year, chunk in zip(years, chunks):
+            filename = os.path.join(
+                output_dir, f"university_calendar_{academic_year}_{academic_year + 1}.csv")
+            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+                csv.writer(f, delimiter=';').writerow(CSV_HEADER)
+                f.write(chunk)
+            paths.append(os.path.abspath(filename))
+        return paths
+
+
+class PhaseTimer:
+    """
+    Замер длительности этапов работы (по perf_counter)
+
+    Выключенный таймер ничего не замеряет, поэтому этапы можно
+    размечать всегда, а включать замер по флагу.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Добавляет время этапа; повторные замеры одного этапа суммируются"""
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    def totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for name, seconds in self.phases:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def summary(self) -> str:
+        """Строка вида 'генерация 1.2 мс, вывод таблицы 3.4 мс'"""
+        return ", ".join(f"{name} {seconds * 1000:.1f} мс"
+                         for name, seconds in self.totals().items())
+
+    def report(self, file=None) -> None:
+        """Вывод таблицы этапов (по умолчанию в stderr, чтобы не смешивать с результатом)"""
+        file = file or sys.stderr
+        totals = self.totals()
+        print(f"\n⏱ ВРЕМЯ ЭТАПОВ", file=file)
+        for name, seconds in totals.items():
+            print(f"  {name:<20} {seconds * 1000:>10.2f} мс", file=file)
+        print(f"  {'всего':<20} {sum(totals.values()) * 1000:>10.2f} мс", file=file)
 
 
 def main():
     """Точка входа в программу"""
+    started = time.perf_counter()
     
     parser = argparse.ArgumentParser(
         description='Генератор учебного календаря для университета',
@@ -257,32 +1301,135 @@ def main():
   %(prog)s -y 2026           # Конкретный год
   %(prog)s -y 2026 -d        # Подробный вывод
   %(prog)s -y 2026 -e        # Экспорт в CSV
+  %(prog)s -y 2026 -e --format xlsx  # Экспорт в Excel
   %(prog)s -y 2026 -a        # Анализ года
   %(prog)s -y 2026 -s        # Статистика
+  %(prog)s -y 2026 -w 1000000 --stream -e   # Потоковый экспорт
+  %(prog)s -y 2000-2100 -e   # Экспорт каждого года в папку output
+  %(prog)s -y 2020,2024-2026 -e --merge   # Один общий файл
+  %(prog)s --build-index parity.idx --index-range 1900-2200
+  %(prog)s --serve --port 8080  # HTTP-сервис четности
+  cat dates.txt | %(prog)s --pipe  # Разметка дат из stdin
+  %(prog)s --annotate-csv bookings.csv --date-column "Дата" -o out.csv
+  %(prog)s -y 2026 -e --timings   # Время этапов
+  %(prog)s -y 2026 --profile out.prof  # Профиль cProfile
         """
     )
     
-    parser.add_argument('-y', '--year', type=int,
-                       help='Год начала учебного года (напр., 2026)')
+    parser.add_argument('-y', '--year', type=parse_years,
+                       help='Год начала учебного года (напр., 2026), '
+                            'диапазон (2000-2100) или список (2020,2024-2026)')
     parser.add_argument('-d', '--detailed', action='store_true',
                        help='Подробный вывод с примечаниями')
     parser.add_argument('-e', '--export', action='store_true',
-                       help='Экспорт в CSV файл')
+                       help='Экспорт в файл (CSV или XLSX, см. --format)')
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv',
+                       help='Формат экспорта (по умолчанию: csv)')
     parser.add_argument('-a', '--analyze', action='store_true',
                        help='Анализ структуры учебного года')
     parser.add_argument('-s', '--stats', action='store_true',
                        help='Показать статистику')
     parser.add_argument('-w', '--weeks', type=int, default=52,
                        help='Количество недель (по умолчанию: 52)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Потоковый режим: недели выводятся и экспортируются '
+                            'по мере генерации, без хранения в памяти')
+    parser.add_argument('--build-index', metavar='FILE',
+                       help='Записать бинарный индекс четности по дням')
+    parser.add_argument('--index-range', type=parse_year_range, default=(1900, 2200),
+                       metavar='ГОД-ГОД',
+                       help='Диапазон лет индекса (по умолчанию: 1900-2200)')
+    parser.add_argument('--serve', action='store_true',
+                       help='Запустить HTTP-сервис четности')
+    parser.add_argument('--host', default='127.0.0.1',
+                       help='Адрес HTTP-сервиса (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080,
+                       help='Порт HTTP-сервиса (по умолчанию: 8080)')
+    parser.add_argument('--pipe', action='store_true',
+                       help='Разметить даты (по строке или NDJSON) из stdin в stdout')
+    parser.add_argument('--date-field', default='date',
+                       help='Поле с датой в NDJSON-объектах (по умолчанию: date)')
+    parser.add_argument('--annotate-csv', metavar='FILE',
+                       help='Добавить к CSV-файлу столбцы с номером недели и четностью')
+    parser.add_argument('--date-column',
+                       help='Имя столбца с датой для --annotate-csv')
+    parser.add_argument('-o', '--output',
+                       help='Файл результата для --annotate-csv')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='Количество процессов (по умолчанию: число ядер)')
+    parser.add_argument('--merge', action='store_true',
+                       help='При экспорте нескольких лет - один общий файл')
+    parser.add_argument('--timings', action='store_true',
+                       help='Показать время этапов (в stderr)')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Записать профиль cProfile в файл (для pstats/snakeviz)')
     
     args = parser.parse_args()
+    
+    timer = PhaseTimer(enabled=args.timings)
+    timer.add('разбор аргументов', time.perf_counter() - started)
+    
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, parser, args, timer)
+        finally:
+            profiler.dump_stats(args.profile)
+            print(f"\n📈 Профиль записан в: {os.path.abspath(args.profile)}", file=sys.stderr)
+    else:
+        run(parser, args, timer)
+    
+    if args.timings:
+        timer.report()
+
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace,
+        timer: Optional[PhaseTimer] = None) -> None:
+    """Выполняет команду по разобранным аргументам, размечая этапы в timer"""
+    if timer is None:
+        timer = PhaseTimer(enabled=False)
+
+    if args.annotate_csv:
+        if not args.date_column:
+            parser.error("для --annotate-csv нужен --date-column")
+        from csv_annotate import annotate_csv
+        root, ext = os.path.splitext(args.annotate_csv)
+        output = args.output or f"{root}_annotated{ext or '.csv'}"
+        with timer.phase('разметка'):
+            rows = annotate_csv(args.annotate_csv, output, args.date_column, jobs=args.jobs)
+        print(f"💾 Размечено строк: {rows}, результат: {os.path.abspath(output)}")
+        return
+
+    if args.pipe:
+        try:
+            with timer.phase('разметка'):
+                annotate_stream(sys.stdin.buffer, sys.stdout.buffer, args.date_field)
+                sys.stdout.flush()
+        except BrokenPipeError:
+            # Читатель закрыл канал (например, head) - это не ошибка;
+            # stdout перенаправляется, чтобы не упасть при финальном flush
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
+    if args.serve:
+        import asyncio
+        asyncio.run(serve(args.host, args.port))
+        return
+
+    if args.build_index:
+        from parity_index import build_index
+        first_year, last_year = args.index_range
+        with timer.phase('запись индекса'):
+            filepath = build_index(args.build_index, first_year, last_year)
+        print(f"💾 Индекс {first_year}-{last_year} записан в: {filepath}")
+        return
 
     if args.year:
-        if not validate_year(args.year):
-            current_year = datetime.date.today().year
-            print(f"❌ Год должен быть между 2000 и {current_year + 20}")
+        if not all(validate_year(y) for y in args.year):
+            print(f"❌ Год должен быть между {datetime.MINYEAR} и {datetime.MAXYEAR}")
             sys.exit(1)
-        year = args.year
+        year = args.year[0]
     else:
         today = datetime.date.today()
         year = today.year if today.month >= 9 else today.year - 1
@@ -291,42 +1438,113 @@ def main():
     print(f"{'='*50}")
 
     if args.analyze:
-        analyze_year(year)
+        with timer.phase('анализ'):
+            for year in args.year or [year]:
+                analyze_year(year)
+        return
+
+    if args.year and len(args.year) > 1:
+        years = args.year
+        if args.export:
+            with timer.phase('экспорт'):
+                paths = export_years(years, args.weeks, merge=args.merge, jobs=args.jobs,
+                                     fmt=args.format)
+            print(f"Учебные годы: {years[0]}-{years[-1] + 1} ({len(years)})")
+            print(f"\n💾 Экспортировано файлов: {len(paths)} в {os.path.dirname(paths[0])}")
+            return
+        for year in years:
+            calendar = UniversityCalendar(year)
+            with timer.phase('генерация'):
+                calendar.generate(args.weeks)
+            with timer.phase('вывод таблицы'):
+                calendar.print_table(show_notes=args.detailed)
         return
     
     calendar = UniversityCalendar(year)
-    calendar.generate(args.weeks)
+    if args.stream:
+        stream_calendar(calendar, args, timer)
+        return
+
+    with timer.phase('генерация'):
+        calendar.generate(args.weeks)
 
     first_week = calendar.weeks[0] if calendar.weeks else None
     if first_week:
         print(f"Учебный год: {year}-{year+1}")
-        print(f"Первая неделя: {first_week.start_date.strftime('%d.%m.%Y')} - "
-              f"{first_week.end_date.strftime('%d.%m.%Y')} ({first_week.parity})")
+        print(f"Первая неделя: {format_date(first_week.start_date)} - "
+              f"{format_date(first_week.end_date)} ({first_week.parity})")
 
-    calendar.print_table(show_notes=args.detailed)
+    with timer.phase('вывод таблицы'):
+        calendar.print_table(show_notes=args.detailed)
 
     current_week = calendar.get_current_week()
     if current_week:
         print(f"\n📌 ТЕКУЩАЯ НЕДЕЛЯ: №{current_week.number} "
               f"({current_week.parity}) "
-              f"{current_week.start_date.strftime('%d.%m.%Y')} - "
-              f"{current_week.end_date.strftime('%d.%m.%Y')}")
+              f"{format_date(current_week.start_date)} - "
+              f"{format_date(current_week.end_date)}")
 
     if args.stats:
-        stats = calendar.get_statistics()
+        with timer.phase('статистика'):
+            print_statistics(calendar.get_statistics())
+
+    if args.export:
+        with timer.phase('экспорт'):
+            if args.format == 'xlsx':
+                filepath = calendar.export_xlsx()
+            else:
+                filepath = calendar.export_csv()
+        print(f"\n💾 Экспортировано в: {filepath}")
+
+
+def print_statistics(stats: dict) -> None:
+    """Вывод статистики по календарю"""
+    if stats:
         print(f"\n{'='*50}")
         print(f"СТАТИСТИКА")
         print(f"{'='*50}")
         print(f"Всего недель: {stats['total_weeks']}")
         print(f"Нечётных: {stats['odd_weeks']}")
         print(f"Чётных: {stats['even_weeks']}")
-        print(f"Начало: {stats['start_date'].strftime('%d.%m.%Y')}")
-        print(f"Окончание: {stats['end_date'].strftime('%d.%m.%Y')}")
+        print(f"Начало: {format_date(stats['start_date'])}")
+        print(f"Окончание: {format_date(stats['end_date'])}")
         if stats['current_week']:
             print(f"Текущая неделя: №{stats['current_week']}")
 
+
+def stream_calendar(calendar: UniversityCalendar, args: argparse.Namespace,
+                    timer: Optional[PhaseTimer] = None) -> None:
+    """Потоковый режим: недели выдаются iter_weeks() и сразу выводятся"""
+    if timer is None:
+        timer = PhaseTimer(enabled=False)
+    stop = args.weeks + 1
+    with timer.phase('генерация'):
+        stats = calendar.summarize(args.weeks)
+    if stats:
+        first_week = next(calendar.iter_weeks(1, 2))
+        print(f"Учебный год: {calendar.academic_year}-{calendar.academic_year+1}")
+        print(f"Первая неделя: {format_date(first_week.start_date)} - "
+              f"{format_date(first_week.end_date)} ({first_week.parity})")
+
+    # В потоковом режиме недели генерируются во время вывода и экспорта
+    with timer.phase('вывод таблицы'):
+        calendar.print_table(show_notes=args.detailed, weeks=calendar.iter_weeks(stop=stop))
+
+    if stats.get('current_week'):
+        number = stats['current_week']
+        current_week = next(calendar.iter_weeks(number, number + 1))
+        print(f"\n📌 ТЕКУЩАЯ НЕДЕЛЯ: №{current_week.number} "
+              f"({current_week.parity}) "
+              f"{format_date(current_week.start_date)} - "
+              f"{format_date(current_week.end_date)}")
+
+    if args.stats:
+        print_statistics(stats)
+
     if args.export:
-        filepath = calendar.export_csv()
+        with timer.phase('экспорт'):
+            export = calendar.export_xlsx if args.format == 'xlsx' else calendar.export_csv
+            filepath = export(weeks=calendar.iter_weeks(stop=stop))
         print(f"\n💾 Экспортировано в: {filepath}")
 
 
@@ -0,0 +1,125 @@
+"""
+Бинарный индекс четности по дням
+
+Файл содержит по одной записи на каждый календарный день диапазона:
+смещение учебного года, номер недели и бит четности. Читатель
+отображает файл в память (mmap), поэтому поиск - одно вычисление
+смещения, а несколько процессов на одной машине делят страницы кэша.
+"""
+
+import datetime
+import mmap
+import os
+import struct
+from typing import Tuple
+
+from main import PARITY_SYMBOLS, _anchor
+
+# magic, версия, размер записи, ординал первого дня, число дней, базовый год
+HEADER = struct.Struct('<4sHHiii')
+# смещение учебного года от базового, номер недели, бит четности
+RECORD = struct.Struct('<HBB')
+
+MAGIC = b'NPTY'
+VERSION = 1
+
+
+def build_index(path: str, first_year: int, last_year: int) -> str:
+    """
+    Записывает индекс для дней с 1 января first_year по 31 декабря last_year
+
+    Args:
+        path: Путь к файлу индекса
+        first_year: Первый календарный год
+        last_year: Последний календарный год (включительно)
+
+    Returns:
+        Путь к созданному файлу
+    """
+    if not datetime.MINYEAR <= first_year <= last_year <= datetime.MAXYEAR:
+        raise ValueError(f"Некорректный диапазон лет: {first_year}-{last_year}")
+
+    first_ordinal = datetime.date(first_year, 1, 1).toordinal()
+    last_ordinal = datetime.date(last_year, 12, 31).toordinal()
+
+    # 1 января всегда относится к учебному году, начавшемуся в прошлом году
+    base_year = first_year - 1
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, first_ordinal,
+                            last_ordinal - first_ordinal + 1, base_year))
+
+        for academic_year in range(base_year, last_year + 1):
+            start, first_bit = _anchor(academic_year)
+            next_start, _ = _anchor(academic_year + 1)
+            begin = max(start, first_ordinal)
+            end = min(next_start, last_ordinal + 1)
+            if begin >= end:
+                continue
+
+            chunk = bytearray()
+            for week_start in range(start + (begin - start) // 7 * 7, end, 7):
+                index = (week_start - start) // 7
+                record = RECORD.pack(academic_year - base_year, index + 1,
+                                     (first_bit + index) & 1)
+                chunk += record * 7
+            # Отрезаем дни первой и последней недели вне диапазона
+            skip = (begin - start) % 7
+            f.write(chunk[skip * RECORD.size:(skip + end - begin) * RECORD.size])
+
+    return os.path.abspath(path)
+
+
+class ParityIndex:
+    """Чтение индекса четности через mmap"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        magic, version, record_size, first_ordinal, day_count, base_year = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"Файл {path} не является индексом четности")
+
+        self.first_ordinal = first_ordinal
+        self.day_count = day_count
+        self.base_year = base_year
+
+    @property
+    def first_date(self) -> datetime.date:
+        return datetime.date.fromordinal(self.first_ordinal)
+
+    @property
+    def last_date(self) -> datetime.date:
+        return datetime.date.fromordinal(self.first_ordinal + self.day_count - 1)
+
+    def lookup(self, day: datetime.date) -> Tuple[int, int, str]:
+        """
+        Учебный год, номер недели и четность для даты
+
+        Raises:
+            ValueError: Дата вне диапазона индекса
+        """
+        index = day.toordinal() - self.first_ordinal
+        if not 0 <= index < self.day_count:
+            raise ValueError(f"Дата {day} вне диапазона индекса "
+                             f"({self.first_date} - {self.last_date})")
+        year_offset, week_number, parity_bit = RECORD.unpack_from(
+            self._map, HEADER.size + index * RECORD.size)
+        return self.base_year + year_offset, week_number, PARITY_SYMBOLS[parity_bit]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ParityIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,173 @@
+"""
+Потоковая запись XLSX без сторонних библиотек
+
+Книга из одного листа пишется напрямую в zip-архив: XML листа
+выводится по мере поступления строк, поэтому память не зависит от
+числа недель. Строки хранятся как встроенные (inlineStr), без общей
+таблицы строк. Оформление - общие стили: заголовок, нечётная и
+чётная неделя, текущая неделя.
+"""
+
+import os
+import zipfile
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+# Индексы стилей ячеек (cellXfs в styles.xml)
+STYLE_DEFAULT = 0
+STYLE_HEADER = 1
+STYLE_ODD = 2
+STYLE_EVEN = 3
+STYLE_CURRENT = 4
+
+# Сколько строк XML копить перед записью в архив
+FLUSH_ROWS = 1000
+# Наибольшее число строк на листе Excel
+MAX_ROWS = 1048576
+
+Cell = Union[int, float, str, None]
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# Цвета совпадают с GUI: заголовок #1e3a8a, текущая неделя #ffeb3b
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="3">
+<font><sz val="11"/><name val="Calibri"/></font>
+<font><b/><sz val="11"/><name val="Calibri"/></font>
+<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>
+</fonts>
+<fills count="6">
+<fill><patternFill patternType="none"/></fill>
+<fill><patternFill patternType="gray125"/></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FF1E3A8A"/></patternFill></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFE6F0FF"/></patternFill></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFF8FAFC"/></patternFill></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFFFEB3B"/></patternFill></fill>
+</fills>
+<borders count="2">
+<border><left/><right/><top/><bottom/><diagonal/></border>
+<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>
+</borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="5">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="2" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="center" wrapText="1"/></xf>
+<xf numFmtId="0" fontId="0" fillId="3" borderId="1" xfId="0" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center"/></xf>
+<xf numFmtId="0" fontId="0" fillId="4" borderId="1" xfId="0" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center"/></xf>
+<xf numFmtId="0" fontId="1" fillId="5" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center"/></xf>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+_SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>
+{cols}<sheetData>
+"""
+
+_SHEET_END = """</sheetData>
+</worksheet>"""
+
+
+def escape(text: str) -> str:
+    """
+    Экранирует текст для XML (в том числе для значений атрибутов)
+
+    Замена xml.sax.saxutils.escape: тот модуль при импорте загружает
+    urllib.request и ssl, что заметно замедляет запуск GUI и CLI.
+    """
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('"', '&quot;'))
+
+
+def column_letter(index: int) -> str:
+    """Буквенное имя столбца по индексу с нуля: 0 -> A, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _row_xml(number: int, values: Sequence[Cell], style: int, letters: List[str]) -> str:
+    cells = []
+    for column, value in enumerate(values):
+        ref = f"{letters[column]}{number}"
+        if value is None or value == "":
+            cells.append(f'<c r="{ref}" s="{style}"/>')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}" s="{style}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" s="{style}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>\n'
+
+
+def write_xlsx(filename: str, header: Sequence[str],
+               rows: Iterable[Tuple[Sequence[Cell], int]],
+               sheet_name: str = "Календарь",
+               column_widths: Optional[Sequence[float]] = None) -> str:
+    """
+    Записывает книгу XLSX из одного листа
+
+    Args:
+        filename: Имя файла
+        header: Заголовки столбцов (первая строка, закреплена)
+        rows: Пары (значения ячеек, стиль STYLE_*); читаются по одной
+        sheet_name: Имя листа
+        column_widths: Ширины столбцов в символах
+
+    Returns:
+        Путь к созданному файлу
+    """
+    letters = [column_letter(i) for i in range(len(header))]
+    cols = ""
+    if column_widths:
+        cols = "<cols>" + "".join(
+            f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+            for i, width in enumerate(column_widths, start=1)) + "</cols>\n"
+
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31])))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', _STYLES)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_START.format(cols=cols).encode('utf-8'))
+            buffer = [_row_xml(1, header, STYLE_HEADER, letters)]
+            for number, (values, style) in enumerate(rows, start=2):
+                if number > MAX_ROWS:
+                    raise ValueError(f"Лист XLSX вмещает не более {MAX_ROWS} строк")
+                buffer.append(_row_xml(number, values, style, letters))
+                if len(buffer) >= FLUSH_ROWS:
+                    sheet.write("".join(buffer).encode('utf-8'))
+                    buffer.clear()
+            sheet.write("".join(buffer).encode('utf-8'))
+            sheet.write(_SHEET_END.encode('utf-8'))
+
+    return os.path.abspath(filename)
@@ -5,10 +5,48 @@
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Замеры памяти (bench_memory) проверяются в TestMemoryBudgets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
 
+import asyncio
+import csv
+import io
+import json
+import queue
+import subprocess
+import tempfile
+import threading
+import time
 import unittest
-from datetime import date
-from main import UniversityCalendar
+import unittest.mock
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import OrderedDict
+from datetime import date, timedelta
+import main
+from parity_index import ParityIndex, build_index
+from csv_annotate import annotate_csv
+from xlsx_export import write_xlsx
+from main import (UniversityCalendar, WeekTable, lookup_week, academic_year_of,
+                  week_of, parity_of, batch_lookup, first_week_anchor, sept_1_weekday,
+                  validate_year, compile_date_format, PARITY_SYMBOLS, PhaseTimer)
+import bench_memory
+
+try:
+    import gui_app
+except ImportError:  # tkinter не установлен
+    gui_app = None
+
+np = main._numpy()
+
+
+def loaded_by_import_main(modules):
+    """Какие из modules оказываются загружены после import main в чистом процессе"""
+    code = f"import json, sys, main; print(json.dumps([m for m in {modules!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.join(os.path.dirname(__file__), '..', 'src'),
+                            check=True)
+    return json.loads(result.stdout)
 
 
 class TestUniversityCalendar(unittest.TestCase):
@@ -60,5 +98,1192 @@ class TestUniversityCalendar(unittest.TestCase):
         self.assertTrue(date(2025, 9, 1) <= week_with_sept_1.end_date)
 
 
+
+class TestLookup(unittest.TestCase):
+
+    def test_matches_generate(self):
+        """Поиск по дате совпадает со сгенерированным календарем"""
+        for year in (2019, 2024, 2025, 2026):
+            cal = UniversityCalendar(year)
+            for week in cal.generate(52):
+                for offset in (0, 3, 6):
+                    day = week.start_date + timedelta(days=offset)
+                    self.assertEqual(lookup_week(day), (year, week.number, week.parity))
+
+    def test_before_first_week(self):
+        """Дата до первой недели относится к предыдущему учебному году"""
+        # 2024-2025 начинается 02.09.2024, 01.09.2024 - последний день прошлого года
+        self.assertEqual(academic_year_of(date(2024, 9, 1)), 2023)
+        self.assertEqual(academic_year_of(date(2024, 9, 2)), 2024)
+        self.assertEqual(week_of(date(2024, 9, 2)), 1)
+        self.assertEqual(parity_of(date(2024, 9, 2)), "**")
+        self.assertEqual(parity_of(date(2026, 8, 31)), "*")
+
+
+
+class TestCycleTable(unittest.TestCase):
+
+    def test_all_years(self):
+        """Таблица 400-летнего цикла совпадает с расчетом через date для 1..9999"""
+        for year in range(1, 10000):
+            sept_1 = date(year, 9, 1)
+            self.assertEqual(sept_1_weekday(year), sept_1.weekday())
+            if sept_1.weekday() == 6:
+                expected = (sept_1 + timedelta(days=1), "**")
+            else:
+                expected = (sept_1 - timedelta(days=sept_1.weekday()), "*")
+            self.assertEqual(first_week_anchor(year), expected)
+
+    def test_full_range(self):
+        """Поддерживается весь диапазон datetime"""
+        self.assertTrue(validate_year(1))
+        self.assertTrue(validate_year(9999))
+        self.assertFalse(validate_year(0))
+        self.assertEqual(lookup_week(date(1, 1, 1))[0], 0)
+        self.assertEqual(UniversityCalendar(9998).generate(52)[-1].end_date.year, 9999)
+        with self.assertRaises(ValueError):
+            UniversityCalendar(9999).generate(52)
+        for year in (0, -1):
+            with self.assertRaises(ValueError):
+                WeekTable.build(year, 52)
+        self.assertEqual(WeekTable.build(1, 52)[0].start_date, date(1, 8, 27))
+
+
+class TestWeekTable(unittest.TestCase):
+
+    def test_views(self):
+        """Недели создаются по запросу и совпадают со столбцами"""
+        table = WeekTable.build(2024, 5, clock=lambda: date(2024, 9, 18))
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table[-1].number, 5)
+        self.assertEqual(table[4].start_date, date(2024, 9, 30))
+        self.assertEqual([w.number for w in table[1:3]], [2, 3])
+        self.assertEqual([w.is_current for w in table], [False, False, True, False, False])
+        # 1 сентября 2024 - воскресенье, оно не входит в первую неделю
+        self.assertFalse(any(w.contains_sept_1 for w in table))
+        with self.assertRaises(IndexError):
+            table[5]
+
+    def test_statistics(self):
+        """Статистика считается по столбцам"""
+        cal = UniversityCalendar(2025)
+        cal.generate(7)
+        stats = cal.get_statistics()
+        self.assertEqual(stats['total_weeks'], 7)
+        self.assertEqual(stats['odd_weeks'], 4)
+        self.assertEqual(stats['even_weeks'], 3)
+        self.assertEqual(stats['end_date'], date(2025, 10, 19))
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_to_numpy(self):
+        """Столбцы доступны как массивы NumPy"""
+        columns = WeekTable.build(2026, 3).to_numpy()
+        self.assertEqual(columns['start_ordinals'].tolist(),
+                         [date(2026, 8, 31).toordinal() + 7 * i for i in range(3)])
+        self.assertEqual(columns['parity_bits'].tolist(), [0, 1, 0])
+
+
+
+class TestIterWeeks(unittest.TestCase):
+
+    def test_matches_generate(self):
+        """Ленивые недели совпадают со сгенерированными"""
+        cal = UniversityCalendar(2024)
+        cal.today = date(2024, 10, 1)
+        self.assertEqual(list(cal.iter_weeks(stop=53)), list(cal.generate(52)))
+        self.assertEqual([w.number for w in cal.iter_weeks(10, 13)], [10, 11, 12])
+        self.assertEqual(cal.summarize(52), cal.get_statistics())
+
+    def test_unbounded(self):
+        """Без stop генерация идет до конца диапазона дат"""
+        cal = UniversityCalendar(9990)
+        last = None
+        for last in cal.iter_weeks():
+            pass
+        self.assertLessEqual(date.max - last.end_date, timedelta(days=6))
+
+
+class TestCalendarCache(unittest.TestCase):
+
+    def test_snapshot_is_immutable(self):
+        """generate() возвращает неизменяемый снимок, общий для вызовов"""
+        cal = UniversityCalendar(2025)
+        first = cal.generate(10)
+        self.assertIs(UniversityCalendar(2025).generate(10), first)
+        with self.assertRaises(TypeError):
+            first.parity_bits[0] = 1
+        with self.assertRaises(AttributeError):
+            first[0].parity = "**"
+
+    def test_current_week_follows_clock(self):
+        """Текущая неделя вычисляется по часам при обращении, а не при генерации"""
+        now = [date(2025, 9, 3)]
+        cal = UniversityCalendar(2025, clock=lambda: now[0])
+        weeks = cal.generate(52)
+        self.assertEqual(cal.get_current_week().number, 1)
+        now[0] = date(2025, 9, 8)
+        self.assertEqual(cal.get_current_week().number, 2)
+        self.assertEqual([w.number for w in weeks if w.is_current], [2])
+        # Таблица из кэша общая, часы у каждого календаря свои
+        self.assertIs(weeks.start_ordinals.obj, main.get_calendar(2025, 52).start_ordinals.obj)
+
+    def test_lru_eviction(self):
+        """Самые старые записи вытесняются"""
+        cache = main.CalendarCache(maxsize=2)
+        first = cache.get(2020, 5)
+        cache.get(2021, 5)
+        self.assertIs(cache.get(2020, 5), first)
+        cache.get(2022, 5)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get(2021, 5), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_single_flight(self):
+        """Одновременные промахи по одному ключу строят календарь один раз"""
+        cache = main.CalendarCache()
+        calls = []
+        build = WeekTable.build
+
+        def slow_build(*args):
+            calls.append(args)
+            time.sleep(0.05)
+            return build(*args)
+
+        results = []
+        with unittest.mock.patch.object(WeekTable, 'build', side_effect=slow_build):
+            threads = [threading.Thread(target=lambda: results.append(cache.get(2026, 52)))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+class TestBatchLookup(unittest.TestCase):
+
+    def setUp(self):
+        start = date(1995, 1, 1)
+        self.days = [start + timedelta(days=i) for i in range(0, 40 * 366, 5)]
+        self.expected = [lookup_week(day) for day in self.days]
+
+    def check(self, result):
+        self.assertEqual(len(result.academic_years), len(self.days))
+        actual = [(int(y), int(w), PARITY_SYMBOLS[b]) for y, w, b
+                  in zip(result.academic_years, result.week_numbers, result.parity_bits)]
+        self.assertEqual(actual, self.expected)
+
+    def test_python_fallback(self):
+        """Без NumPy результат совпадает с поиском по одной дате"""
+        self.check(main._batch_lookup_python(self.days))
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_numpy(self):
+        """Векторный расчет для datetime64[D] совпадает с поиском по одной дате"""
+        self.check(batch_lookup(np.array(self.days, dtype='datetime64[D]')))
+        self.check(batch_lookup(self.days))
+
+    def test_numpy_is_imported_lazily(self):
+        """import main не загружает NumPy - он нужен только пакетным вызовам"""
+        self.assertEqual(loaded_by_import_main(['numpy']), [])
+
+
+
+class TestMultiYear(unittest.TestCase):
+
+    def test_parse_years(self):
+        """Годы задаются числом, диапазоном или списком"""
+        self.assertEqual(main.parse_years("2026"), [2026])
+        self.assertEqual(main.parse_years("2024-2026,2020,2025"), [2020, 2024, 2025, 2026])
+
+    def test_export_years(self):
+        """Экспорт нескольких лет - по файлу на год или один общий файл"""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = main.export_years([2024, 2025], 3, output_dir=tmp, jobs=2)
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ['university_calendar_2024_2025.csv',
+                              'university_calendar_2025_2026.csv'])
+            with open(paths[0], encoding='utf-8-sig') as f:
+                self.assertEqual(len(f.read().splitlines()), 4)
+
+            [merged] = main.export_years([2024, 2025], 3, output_dir=tmp, merge=True, jobs=2)
+            with open(merged, newline='', encoding='utf-8-sig') as f:
+                rows = list(csv.reader(f, delimiter=';'))
+        self.assertEqual(rows[0][0], 'Учебный год')
+        self.assertEqual([row[0] for row in rows[1:]], ['2024'] * 3 + ['2025'] * 3)
+        self.assertEqual(rows[4][2], '01.09.2025')
+
+
+class TestParityIndex(unittest.TestCase):
+
+    def test_roundtrip(self):
+        """Записи индекса совпадают с поиском по дате"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'parity.idx')
+            build_index(path, 2023, 2026)
+            with ParityIndex(path) as index:
+                self.assertEqual(index.first_date, date(2023, 1, 1))
+                self.assertEqual(index.last_date, date(2026, 12, 31))
+                day = index.first_date
+                while day <= index.last_date:
+                    self.assertEqual(index.lookup(day), lookup_week(day))
+                    day += timedelta(days=1)
+                with self.assertRaises(ValueError):
+                    index.lookup(date(2027, 1, 1))
+
+
+
+class TestParityApi(unittest.TestCase):
+
+    def request(self, method, target, body=b''):
+        status, payload = main.handle_api_request(method, target, body)
+        return status, json.loads(payload)
+
+    def test_parity(self):
+        """GET /parity возвращает неделю и четность даты"""
+        status, payload = self.request('GET', '/parity?date=2024-09-02')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload, {'date': '2024-09-02', 'academic_year': 2024,
+                                   'week': 1, 'parity': '**'})
+        self.assertEqual(self.request('GET', '/parity?date=02.09.2024')[1], payload)
+        self.assertEqual(self.request('GET', '/parity?date=31.02.2024')[0], 400)
+        self.assertEqual(self.request('GET', '/parity?date=01.01.99999999999999999999')[0], 400)
+
+    def test_batch_and_calendar(self):
+        """POST /parity/batch и GET /calendar/{год}"""
+        status, payload = self.request('POST', '/parity/batch', b'["2026-08-31", "2026-09-07"]')
+        self.assertEqual(status, 200)
+        self.assertEqual([p['parity'] for p in payload], ['*', '**'])
+        self.assertEqual(self.request('POST', '/parity/batch', b'{}')[0], 400)
+
+        status, payload = self.request('GET', '/calendar/2026?weeks=3')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload['weeks']), 3)
+        self.assertEqual(payload['weeks'][0]['start_date'], '2026-08-31')
+        self.assertEqual(self.request('GET', '/calendar/abc')[0], 400)
+        self.assertEqual(self.request('GET', '/unknown')[0], 404)
+
+    def test_server_keep_alive(self):
+        """Сервер отвечает на несколько запросов в одном соединении"""
+        async def scenario():
+            server = await asyncio.start_server(main._handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                bodies = []
+                for target in ('/parity?date=2026-09-01', '/parity?date=2026-09-08'):
+                    writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+                    await writer.drain()
+                    self.assertIn(b'200 OK', await reader.readline())
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line == b'\r\n':
+                            break
+                        name, _, value = line.decode().partition(':')
+                        headers[name.lower()] = value.strip()
+                    bodies.append(json.loads(await reader.readexactly(int(headers['content-length']))))
+                writer.close()
+                return bodies
+
+        bodies = asyncio.run(scenario())
+        self.assertEqual([b['week'] for b in bodies], [1, 2])
+
+    def test_server_modules_are_imported_lazily(self):
+        """Модули сервиса и профилировщика не загружаются при import main"""
+        self.assertEqual(loaded_by_import_main(['asyncio', 'cProfile']), [])
+
+    def test_server_internal_error(self):
+        """Исключение обработчика превращается в ответ 500, а не обрыв соединения"""
+        async def scenario():
+            server = await asyncio.start_server(main._handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b"GET /parity?date=2026-09-01 HTTP/1.1\r\nHost: x\r\n\r\n")
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response
+
+        with unittest.mock.patch('main.lookup_week', side_effect=RuntimeError('сбой')):
+            response = asyncio.run(scenario())
+        head, _, body = response.partition(b'\r\n\r\n')
+        self.assertIn(b'500 Internal Server Error', head)
+        self.assertIn(b'Connection: close', head)
+        self.assertIn('error', json.loads(body))
+
+
+
+class TestAnnotateStream(unittest.TestCase):
+
+    def test_plain_and_ndjson(self):
+        """Строки-даты и NDJSON размечаются построчно"""
+        source = io.BytesIO(
+            "2026-10-18\n18.10.2026\n{\"day\": \"2024-09-02\", \"room\": \"А-101\"}\n".encode())
+        target = io.BytesIO()
+        self.assertEqual(main.annotate_stream(source, target, date_field='day'), 3)
+        lines = target.getvalue().decode().splitlines()
+        self.assertEqual(lines[0], "2026-10-18;2026;7;*")
+        self.assertEqual(lines[1], "18.10.2026;2026;7;*")
+        self.assertEqual(json.loads(lines[2]), {'day': '2024-09-02', 'room': 'А-101',
+                                                'academic_year': 2024, 'week': 1,
+                                                'parity': '**'})
+
+    def test_invalid_lines(self):
+        """Ошибочные строки не прерывают поток"""
+        target = io.BytesIO()
+        with unittest.mock.patch('sys.stderr', io.StringIO()):
+            main.annotate_stream(io.BytesIO(b'bad\n{"x": 1}\n'), target)
+        lines = target.getvalue().decode().splitlines()
+        self.assertEqual(lines[0], "bad;;;")
+        self.assertIn('error', json.loads(lines[1]))
+
+    def test_undecodable_and_overflow_lines(self):
+        """Битый UTF-8 и дата вне диапазона не прерывают поток"""
+        source = io.BytesIO(b'\xff2026-09-01\n01.01.99999999999999999999\n'
+                            b'{"date": "1.1.99999999999999999999"}\n2026-09-01\n')
+        target = io.BytesIO()
+        with unittest.mock.patch('sys.stderr', io.StringIO()):
+            self.assertEqual(main.annotate_stream(source, target), 4)
+        lines = target.getvalue().decode().splitlines()
+        self.assertEqual(lines[0], "\ufffd2026-09-01;;;")
+        self.assertEqual(lines[1], "01.01.99999999999999999999;;;")
+        self.assertIn('error', json.loads(lines[2]))
+        self.assertEqual(lines[3], "2026-09-01;2026;1;*")
+
+
+
+class TestAnnotateCsv(unittest.TestCase):
+
+    def test_parallel_keeps_order(self):
+        """Разметка по частям в нескольких процессах сохраняет порядок строк"""
+        days = [date(2024, 8, 20) + timedelta(days=i) for i in range(400)]
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'in.csv')
+            target = os.path.join(tmp, 'out.csv')
+            with open(source, 'w', newline='', encoding='utf-8-sig') as f:
+                f.write('Аудитория;Дата\r\n')
+                for i, day in enumerate(days):
+                    f.write(f"А-{i};{day.strftime('%d.%m.%Y')}\r\n")
+                f.write('Б-1;нет даты\r\n')
+
+            self.assertEqual(annotate_csv(source, target, 'Дата', jobs=2, chunk_size=512), 401)
+
+            with open(target, newline='', encoding='utf-8-sig') as f:
+                rows = list(csv.reader(f, delimiter=';'))
+        self.assertEqual(rows[0], ['Аудитория', 'Дата', 'Номер недели', 'Четность'])
+        for i, (row, day) in enumerate(zip(rows[1:], days)):
+            _, week_number, parity = lookup_week(day)
+            self.assertEqual(row, [f"А-{i}", day.strftime('%d.%m.%Y'), str(week_number), parity])
+        self.assertEqual(rows[-1], ['Б-1', 'нет даты', '', ''])
+
+    def test_control_characters_and_overflow(self):
+        """Перевод страницы в значении не делит строку, дата вне диапазона не роняет разметку"""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'in.csv')
+            target = os.path.join(tmp, 'out.csv')
+            with open(source, 'w', newline='', encoding='utf-8') as f:
+                f.write('Тема;Дата\n'
+                        'Лекция\x0cчасть 1;01.09.2026\n'
+                        'Семинар\u2028зал;1.1.99999999999999999999\n')
+            self.assertEqual(annotate_csv(source, target, 'Дата', jobs=1), 2)
+            with open(target, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f, delimiter=';'))
+        self.assertEqual(rows[1:], [['Лекция\x0cчасть 1', '01.09.2026', '1', '*'],
+                                    ['Семинар\u2028зал', '1.1.99999999999999999999', '', '']])
+
+    def test_missing_column(self):
+        """Неизвестный столбец - ошибка"""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'in.csv')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write('a;b\n1;2\n')
+            with self.assertRaises(ValueError):
+                annotate_csv(source, os.path.join(tmp, 'out.csv'), 'Дата')
+
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    def test_phases_are_summed(self):
+        """Повторные замеры одного этапа суммируются"""
+        timer = PhaseTimer()
+        for _ in range(2):
+            with timer.phase('генерация'):
+                pass
+        timer.add('экспорт', 0.5)
+        totals = timer.totals()
+        self.assertEqual(list(totals), ['генерация', 'экспорт'])
+        self.assertEqual(totals['экспорт'], 0.5)
+        self.assertIn('экспорт 500.0 мс', timer.summary())
+
+    def test_disabled(self):
+        """Выключенный таймер ничего не записывает"""
+        timer = PhaseTimer(enabled=False)
+        with timer.phase('генерация'):
+            pass
+        timer.add('экспорт', 1.0)
+        self.assertEqual(timer.phases, [])
+
+    def test_cli_timings_and_profile(self):
+        """--timings печатает этапы в stderr, --profile пишет профиль"""
+        with tempfile.TemporaryDirectory() as tmp:
+            profile = os.path.join(tmp, 'out.prof')
+            argv = ['main.py', '-y', '2026', '-w', '4', '--timings', '--profile', profile]
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with unittest.mock.patch.object(sys, 'argv', argv), \
+                    unittest.mock.patch.object(sys, 'stdout', stdout), \
+                    unittest.mock.patch.object(sys, 'stderr', stderr):
+                main.main()
+            self.assertTrue(os.path.getsize(profile) > 0)
+        self.assertIn('генерация', stderr.getvalue())
+        self.assertIn('вывод таблицы', stderr.getvalue())
+        self.assertNotIn('ВРЕМЯ ЭТАПОВ', stdout.getvalue())
+
+
+
+class TestDateFormat(unittest.TestCase):
+
+    def test_matches_strftime(self):
+        """Скомпилированный формат совпадает с strftime"""
+        day = date(2026, 3, 7)
+        for fmt in ['%d.%m.%Y', '%Y-%m-%d', '{%d}/%m/%y 100%%', '%d %B %Y']:
+            with self.subTest(fmt):
+                self.assertEqual(compile_date_format(fmt)(day), day.strftime(fmt))
+
+    def test_small_years_padded(self):
+        """Год до 1000 выводится четырьмя цифрами"""
+        self.assertEqual(compile_date_format('%d.%m.%Y')(date(1, 8, 27)), '27.08.0001')
+        rows = list(UniversityCalendar(1).csv_rows(UniversityCalendar(1).iter_weeks(1, 2)))
+        self.assertEqual(rows[0][1:3], ['27.08.0001', '02.09.0001'])
+
+
+class TestXlsxExport(unittest.TestCase):
+
+    NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+    def read_sheet(self, path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                ET.fromstring(archive.read(name))  # все части - корректный XML
+            sheet = ET.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        rows = []
+        for row in sheet.iter(f"{{{self.NS['x']}}}row"):
+            cells = []
+            for cell in row:
+                text = cell.find('x:is/x:t', self.NS)
+                value = cell.find('x:v', self.NS)
+                cells.append((text.text if text is not None else value.text, cell.get('s')))
+            rows.append(cells)
+        return rows
+
+    def test_export(self):
+        """Значения как в CSV, стили по четности и текущей неделе"""
+        cal = UniversityCalendar(2026, clock=lambda: date(2026, 9, 9))
+        cal.generate(4)
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = self.read_sheet(cal.export_xlsx(os.path.join(tmp, 'c.xlsx')))
+        self.assertEqual([value for value, _ in rows[0]], main.CSV_HEADER)
+        self.assertEqual(len(rows), 5)
+        for cells, csv_row in zip(rows[1:], cal.csv_rows()):
+            self.assertEqual([value for value, _ in cells], [str(v) for v in csv_row])
+        styles = [cells[0][1] for cells in rows]
+        self.assertEqual(styles, ['1', '2', '4', '2', '3'])
+
+    def test_escaping(self):
+        """Спецсимволы XML в значениях и имени листа экранируются"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_xlsx(os.path.join(tmp, 'c.xlsx'), ['a & b'], [(['<"x">'], 0)],
+                              sheet_name='"Лист" <1>')
+            rows = self.read_sheet(path)
+            with zipfile.ZipFile(path) as archive:
+                workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        self.assertEqual([[value for value, _ in row] for row in rows], [['a & b'], ['<"x">']])
+        self.assertEqual(workbook.find('x:sheets/x:sheet', self.NS).get('name'), '"Лист" <1>')
+        # xml.sax.saxutils загружал бы urllib.request и ssl
+        self.assertEqual(loaded_by_import_main(['urllib.request', 'ssl']), [])
+
+    def test_streamed_weeks(self):
+        """Недели из iter_weeks() записываются без хранения календаря"""
+        cal = UniversityCalendar(2026)
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = self.read_sheet(cal.export_xlsx(os.path.join(tmp, 'c.xlsx'),
+                                                   weeks=cal.iter_weeks(stop=1001)))
+        self.assertEqual(len(rows), 1001)
+        self.assertEqual(rows[-1][0][0], '1000')
+
+
+class TestMemoryBudgets(unittest.TestCase):
+    """Память на неделю не должна незаметно расти (бюджеты в bench_memory.BUDGETS)"""
+
+    def test_budgets(self):
+        for name in bench_memory.MEASUREMENTS:
+            with self.subTest(name):
+                result = bench_memory.run_measurements([name])[name]
+                self.assertEqual(bench_memory.check_budget(name, result), [])
+
+    def test_budget_violation_is_reported(self):
+        result = bench_memory.MemoryResult(weeks=10, peak=10_000, retained=10_000)
+        self.assertEqual(len(bench_memory.check_budget('generate_100k', result)), 2)
+
+
+class FakeVar:
+    """Замена tk.StringVar для GUI без окна"""
+
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeRoot:
+    """Замена корневого окна: таймеры after() копятся в jobs"""
+
+    def __init__(self):
+        self.jobs = {}
+        self._next_id = 0
+
+    def after(self, ms, func=None, *args):
+        self._next_id += 1
+        job = f"after#{self._next_id}"
+        self.jobs[job] = (ms, func, args)
+        return job
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def title(self, text):
+        pass
+
+    def configure(self, **options):
+        pass
+
+
+class FakeTree:
+    """Замена Treeview: строки по iid и журнал изменений"""
+
+    def __init__(self):
+        self.rows = {}
+        self.changes = []
+        self.selected = None
+        self._next_id = 0
+
+    def insert(self, parent, index, values=(), tags=()):
+        self._next_id += 1
+        iid = f"I{self._next_id}"
+        self.rows[iid] = {'values': tuple(values), 'tags': tuple(tags)}
+        self.changes.append(('insert', iid))
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+            self.changes.append(('delete', iid))
+
+    def item(self, iid, **options):
+        self.rows[iid].update((key, tuple(value)) for key, value in options.items())
+        self.changes.extend((key, iid) for key in options)
+
+    def get_children(self):
+        return tuple(self.rows)
+
+    def selection_set(self, iid):
+        self.selected = iid
+
+    def focus(self, iid=None):
+        pass
+
+    def see(self, iid):
+        pass
+
+
+class FakeScrollbar:
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def windowless_gui(clock, virtual_rows=10):
+    """AcademicCalendarGUI без Tk: состояние как после __init__, виджеты - заглушки"""
+    app = gui_app.AcademicCalendarGUI.__new__(gui_app.AcademicCalendarGUI)
+    app.root = FakeRoot()
+    app.clock = clock
+    app.calendar_data = []
+    app._generation_id = 0
+    app._generation_pending = False
+    app._generation_results = queue.Queue()
+    app._generation_poll_job = None
+    app._midnight_job = None
+    app.current_week_index = None
+    app._prefetched = OrderedDict()
+    app._prefetch_lock = threading.Lock()
+    app.current_year = app.get_current_academic_year()
+    for name in ('year_var', 'status_var', 'info_text', 'today_info_text', 'jump_var',
+                 'filter_date_from_var', 'filter_date_to_var',
+                 'filter_week_from_var', 'filter_week_to_var'):
+        setattr(app, name, FakeVar())
+    app.weeks_var = FakeVar("52")
+    app.filter_parity_var = FakeVar(app.FILTER_PARITY_CHOICES[0])
+    app.tree = FakeTree()
+    app.scrollbar = FakeScrollbar()
+    app.row_ids = {}
+    app.row_state = {}
+    app.display = range(0)
+    app.virtual_mode = False
+    app.virtual_offset = 0
+    app.virtual_rows = virtual_rows
+    app.filters = None
+    app.parity_index = {}
+    return app
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiGeneration(unittest.TestCase):
+
+    def test_stale_results_are_dropped(self):
+        """Результат устаревшего запроса не показывается"""
+        app = windowless_gui(lambda: date(2026, 9, 9))
+        app._apply_generation = unittest.mock.Mock()
+        app._generation_id = 2
+        app._generation_pending = True
+        app._generation_results.put((1, 2025, ['старый'], None, None))
+
+        app._poll_generation()
+        app._apply_generation.assert_not_called()
+        # Текущий запрос еще считается - опрос продолжается
+        self.assertIsNotNone(app._generation_poll_job)
+
+        app._generation_results.put((1, 2025, ['старый'], None, None))
+        app._generation_results.put((2, 2026, ['новый'], None, None))
+        app._poll_generation()
+        app._apply_generation.assert_called_once_with(2026, ['новый'], None, None)
+        self.assertFalse(app._generation_pending)
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiTableDiff(unittest.TestCase):
+
+    def show(self, app, year, weeks):
+        app.calendar_data = app.build_calendar_data(year, weeks)
+        app.refresh_table()
+
+    def test_year_switch_updates_cells_in_place(self):
+        """Смена года меняет значения существующих строк без вставки и удаления"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        self.show(app, 2026, 20)
+        iids = dict(app.row_ids)
+
+        app.tree.changes.clear()
+        self.show(app, 2027, 20)
+        self.assertEqual(app.row_ids, iids)
+        operations = {operation for operation, _ in app.tree.changes}
+        self.assertEqual(operations, {'values', 'tags'})
+        # Тег снимается только со строки прежней текущей недели
+        self.assertEqual([iid for operation, iid in app.tree.changes if operation == 'tags'],
+                         [iids[6]])
+        self.assertEqual(app.tree.rows[iids[0]]['values'][1], "30.08.2027")
+
+    def test_same_data_changes_nothing(self):
+        """Повторный показ того же календаря не трогает таблицу"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        self.show(app, 2026, 20)
+        app.tree.changes.clear()
+        self.show(app, 2026, 20)
+        self.assertEqual(app.tree.changes, [])
+
+    def test_week_count_change(self):
+        """Изменение числа недель добавляет или удаляет только строки в конце"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        self.show(app, 2026, 20)
+        iids = dict(app.row_ids)
+
+        app.tree.changes.clear()
+        self.show(app, 2026, 15)
+        self.assertEqual(sorted(app.tree.changes),
+                         sorted(('delete', iids[key]) for key in range(15, 20)))
+        self.assertEqual(app.row_ids, {key: iids[key] for key in range(15)})
+
+        app.tree.changes.clear()
+        self.show(app, 2026, 18)
+        self.assertEqual([operation for operation, _ in app.tree.changes], ['insert'] * 3)
+        self.assertEqual(len(app.tree.rows), 18)
+
+    def test_mode_switch_starts_from_empty_table(self):
+        """При переходе в виртуальный режим строки списка удаляются"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        self.show(app, 2026, 20)
+        old_iids = set(app.row_ids.values())
+        self.show(app, 2026, 300)
+        self.assertTrue(app.virtual_mode)
+        self.assertEqual(len(app.tree.rows), app.virtual_rows)
+        self.assertFalse(old_iids & set(app.tree.rows))
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiCalendarRows(unittest.TestCase):
+
+    def counting_gui(self):
+        calls = []
+
+        def clock():
+            calls.append(1)
+            return date(2026, 10, 18)
+
+        app = windowless_gui(clock)
+        app.calendar_data = app.build_calendar_data(2026, 1000)
+        self.assertIsInstance(app.calendar_data, gui_app.CalendarRows)
+        calls.clear()
+        return app, calls
+
+    def test_iteration_reads_clock_once(self):
+        """Обход и экспорт ленивого календаря опрашивают часы один раз"""
+        app, calls = self.counting_gui()
+        rows = list(app.calendar_data)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([row['week_num'] for row in rows if row['is_current']], [7])
+        self.assertEqual(rows[:5], app.calendar_data[:5])
+
+        calls.clear()
+        exported = list(app.export_rows())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(exported), 1000)
+
+    def test_window_sync_reads_clock_once(self):
+        """Окно виртуальной таблицы строится одним срезом"""
+        app, calls = self.counting_gui()
+        app.refresh_table()
+        self.assertTrue(app.virtual_mode)
+        self.assertEqual(len(calls), 1)
+
+        calls.clear()
+        app._set_virtual_offset(500)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([values[0] for values, _ in app.row_state.values()],
+                         list(range(501, 511)))
+
+        # С фильтром по четности окно - срез с шагом 2
+        app.filters = dict.fromkeys(('date_from', 'date_to', 'week_from', 'week_to'),
+                                    None)
+        app.filters['parity'] = "чётная"
+        app.parity_index = app.build_parity_index(app.calendar_data)
+        app.virtual_offset = 0
+        calls.clear()
+        app.refresh_table()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([values[0] for values, _ in app.row_state.values()],
+                         list(range(2, 21, 2)))
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = unittest.mock.patch.dict(os.environ, {'APPDATA': tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def saved_gui(self, today):
+        app = windowless_gui(lambda: today)
+        app.weeks_var.set("6")
+        app.calendar_data = app.build_calendar_data(2026, 6)
+        app.update_year_info(2026)
+        app.update_today_info()
+        app.refresh_table()
+        app.save_snapshot(2026)
+        return app
+
+    def test_restore_same_day(self):
+        """Снимок того же дня восстанавливает панель "СЕГОДНЯ" и таблицу"""
+        saved = self.saved_gui(date(2026, 9, 9))
+        self.assertIn("Неделя 2", saved.today_info_text.get())
+        app = windowless_gui(lambda: date(2026, 9, 9))
+        app.weeks_var.set("52")
+        self.assertTrue(app.restore_snapshot())
+        self.assertEqual(app.weeks_var.get(), "6")
+        self.assertEqual(app.info_text.get(), saved.info_text.get())
+        self.assertEqual(app.today_info_text.get(), saved.today_info_text.get())
+        self.assertEqual(app.row_state, saved.row_state)
+        self.assertEqual(list(app.tree.rows.values()), list(saved.tree.rows.values()))
+
+    def test_today_panel_only_on_same_day(self):
+        """На следующий день таблица берется из снимка, а панель "СЕГОДНЯ" - нет"""
+        saved = self.saved_gui(date(2026, 9, 9))
+        app = windowless_gui(lambda: date(2026, 9, 10))
+        self.assertTrue(app.restore_snapshot())
+        self.assertEqual(app.today_info_text.get(), "")
+        self.assertEqual(app.row_state, saved.row_state)
+
+    def test_startup_is_deferred_from_init(self):
+        """Конструктор сам откладывает finish_startup: таймер, затем after_idle"""
+        root = FakeRoot()
+        with unittest.mock.patch.object(gui_app.AcademicCalendarGUI, 'create_widgets'), \
+                unittest.mock.patch.object(gui_app.AcademicCalendarGUI, 'restore_snapshot') as restore:
+            app = gui_app.AcademicCalendarGUI(root, clock=lambda: date(2026, 9, 9))
+        restore.assert_called_once_with()
+        self.assertEqual(list(root.jobs.values()),
+                         [(1, root.after_idle, (app.finish_startup,))])
+
+    def test_mismatch_is_not_restored(self):
+        """Снимок другого учебного года или другой версии не показывается"""
+        self.saved_gui(date(2026, 9, 9))
+        app = windowless_gui(lambda: date(2027, 9, 9))
+        self.assertFalse(app.restore_snapshot())
+        self.assertEqual(app.tree.rows, {})
+
+        path = gui_app.snapshot_path()
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        snapshot['version'] = gui_app.SNAPSHOT_VERSION - 1
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        app = windowless_gui(lambda: date(2026, 9, 9))
+        self.assertFalse(app.restore_snapshot())
+        self.assertEqual(app.tree.rows, {})
+        self.assertEqual(app.weeks_var.get(), "52")
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiMidnight(unittest.TestCase):
+
+    def midnight_gui(self, weeks, offset=0):
+        """Календарь 2026 года в таблице; часы переводятся через days[0]"""
+        days = [date(2026, 9, 13)]  # воскресенье второй недели
+        app = windowless_gui(lambda: days[0])
+        app.calendar_data = app.build_calendar_data(2026, weeks)
+        app.update_today_info()
+        app.refresh_table()
+        if offset:
+            app._set_virtual_offset(offset)
+        app.tree.changes.clear()
+        return app, days
+
+    def current_rows(self, app):
+        return [key for key, (_, tags) in app.row_state.items() if 'current' in tags]
+
+    def test_list_mode(self):
+        """В полночь меняются теги только двух строк, календарь не пересчитывается"""
+        app, days = self.midnight_gui(6)
+        data = app.calendar_data
+        self.assertEqual(self.current_rows(app), [1])
+
+        days[0] += timedelta(days=1)
+        app._on_midnight()
+        self.assertIs(app.calendar_data, data)
+        self.assertEqual(app.current_week_index, 2)
+        self.assertEqual(self.current_rows(app), [2])
+        self.assertEqual(app.tree.changes, [('tags', app.row_ids[1]), ('tags', app.row_ids[2])])
+        self.assertEqual(app.tree.rows[app.row_ids[2]]['tags'], ('current',))
+        self.assertTrue(data[2]['is_current'] and not data[1]['is_current'])
+        self.assertIn("Неделя 3", app.today_info_text.get())
+        # Таймер переставлен на следующую полночь
+        self.assertEqual(list(app.root.jobs), [app._midnight_job])
+
+        # Тот же день - таблица не трогается
+        app.tree.changes.clear()
+        app._on_midnight()
+        self.assertEqual(app.tree.changes, [])
+
+    def test_after_clear(self):
+        """После очистки таблицы полночь не падает и таймер переставляется"""
+        app, days = self.midnight_gui(6)
+        app.clear_output()
+        self.assertIsNone(app.current_week_index)
+
+        # Индекс, оставшийся от прежнего календаря, тоже не ломает смену дня
+        app.current_week_index = 1
+        days[0] += timedelta(days=1)
+        app._on_midnight()
+        self.assertIsNone(app.current_week_index)
+        self.assertIsNotNone(app._midnight_job)
+        self.assertIn("Сгенерируйте календарь", app.today_info_text.get())
+
+        # Даже при ошибке обновления таймер на следующую полночь ставится
+        app._midnight_job = None
+        with unittest.mock.patch.object(app, 'update_today_info', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                app._on_midnight()
+        self.assertIsNotNone(app._midnight_job)
+
+    def test_virtual_mode(self):
+        """В виртуальном режиме ключи строк считаются от начала окна"""
+        app, days = self.midnight_gui(300)
+        self.assertTrue(app.virtual_mode)
+        data = app.calendar_data
+
+        days[0] += timedelta(days=1)
+        app._on_midnight()
+        self.assertIs(app.calendar_data, data)
+        self.assertEqual(self.current_rows(app), [2])
+        self.assertEqual(app.tree.changes, [('tags', app.row_ids[1]), ('tags', app.row_ids[2])])
+
+        # Окно сдвинуто: прежняя неделя вне окна, новая - в первой строке
+        app, days = self.midnight_gui(300, offset=2)
+        self.assertEqual(self.current_rows(app), [])
+        days[0] += timedelta(days=1)
+        app._on_midnight()
+        self.assertEqual(self.current_rows(app), [0])
+        self.assertEqual(app.tree.changes, [('tags', app.row_ids[0])])
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiFilters(unittest.TestCase):
+
+    def filtered_gui(self, year=2026, weeks=52):
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        self.show_year(app, year, weeks)
+        return app
+
+    def show_year(self, app, year, weeks=52):
+        app.calendar_data = app.build_calendar_data(year, weeks)
+        app.parity_index = app.build_parity_index(app.calendar_data)
+        app.refresh_table()
+
+    def shown_weeks(self, app):
+        return [app.calendar_data[index]['week_num'] for index in app.display]
+
+    def test_build_parity_index(self):
+        """Индексы по четности - range с шагом 2 от первой недели нужной четности"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        for year in (2026, 2030, 2024):
+            data = app.build_calendar_data(year, 9)
+            index = app.build_parity_index(data)
+            for parity in ("нечётная", "чётная"):
+                self.assertIsInstance(index[parity], range)
+                self.assertEqual(list(index[parity]),
+                                 [i for i, week in enumerate(data) if week['parity'] == parity])
+        self.assertEqual(app.build_parity_index([]), {"нечётная": range(0), "чётная": range(0)})
+
+        # Ленивые строки длинного календаря индексируются так же
+        data = app.build_calendar_data(2026, 1000)
+        self.assertIsInstance(data, gui_app.CalendarRows)
+        self.assertEqual(app.build_parity_index(data)["чётная"], range(1, 1000, 2))
+
+    def test_filtered_indices(self):
+        """Четность, окно дат и окно номеров недель пересекаются"""
+        app = self.filtered_gui()
+        self.assertEqual(app.filtered_indices(), range(52))
+
+        filters = dict.fromkeys(('parity', 'date_from', 'date_to', 'week_from', 'week_to'))
+        app.filters = dict(filters, parity="чётная", week_from=3, week_to=8)
+        self.assertEqual(app.filtered_indices(), range(3, 8, 2))
+        # Даты внутри недели захватывают всю неделю; 2026-08-31 - начало первой
+        app.filters = dict(filters, date_from=date(2026, 9, 9), date_to=date(2026, 9, 21))
+        self.assertEqual(app.filtered_indices(), range(1, 4))
+        app.filters = dict(filters, parity="нечётная", date_from=date(2026, 9, 9), week_to=6)
+        self.assertEqual(app.filtered_indices(), range(2, 6, 2))
+        # Окно вне календаря
+        app.filters = dict(filters, date_to=date(2020, 1, 1))
+        self.assertEqual(app.filtered_indices(), range(0))
+        app.filters = dict(filters, week_from=60)
+        self.assertEqual(app.filtered_indices(), range(0))
+
+    def test_apply_filters(self):
+        """Фильтр из полей панели меняет только показанные строки"""
+        app = self.filtered_gui()
+        app.filter_parity_var.set("Чётные")
+        app.filter_week_from_var.set("10")
+        app.filter_week_to_var.set("15")
+        app.apply_filters()
+        self.assertEqual(self.shown_weeks(app), [10, 12, 14])
+        self.assertEqual(len(app.tree.rows), 3)
+        self.assertEqual(app.status_var.get(), "Показано 3 из 52 недель")
+
+        app.filter_week_to_var.set("abc")
+        app.apply_filters()
+        self.assertTrue(app.status_var.get().startswith("Ошибка фильтра"))
+        self.assertEqual(self.shown_weeks(app), [10, 12, 14])
+
+        app.reset_filters()
+        self.assertIsNone(app.filters)
+        self.assertEqual(len(app.display), 52)
+        self.assertEqual(len(app.tree.rows), 52)
+
+    def test_date_filter_follows_year(self):
+        """Окно дат пересчитывается от начала нового календаря, а не остается индексами"""
+        app = self.filtered_gui(2026)
+        app.filter_date_from_var.set("01.10.2026")
+        app.filter_date_to_var.set("31.10.2026")
+        app.apply_filters()
+        self.assertEqual(self.shown_weeks(app), [5, 6, 7, 8, 9])
+
+        # Календарь 2030 года с датами 2026 года не пересекается
+        self.show_year(app, 2030)
+        self.assertEqual(list(app.display), [])
+        self.assertEqual(app.tree.rows, {})
+
+        self.show_year(app, 2026)
+        self.assertEqual(self.shown_weeks(app), [5, 6, 7, 8, 9])
+
+
+class InlineThread:
+    """Замена threading.Thread: цель выполняется сразу в start()"""
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        patcher = unittest.mock.patch.object(gui_app.threading, 'Thread', InlineThread)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_neighbours_are_prefetched(self):
+        """После показа года считаются соседние годы, за пределы 1..9999 не выходя"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        app.prefetch_neighbours(2026, 52)
+        self.assertEqual(list(app._prefetched), [(2025, 52), (2027, 52)])
+
+        app.prefetch_neighbours(1, 52)
+        self.assertNotIn((0, 52), app._prefetched)
+        self.assertIn((2, 52), app._prefetched)
+
+        # Хранится не больше PREFETCH_CACHE_SIZE календарей, старые вытесняются
+        app.prefetch_neighbours(2030, 52)
+        self.assertEqual(len(app._prefetched), app.PREFETCH_CACHE_SIZE)
+        self.assertNotIn((2025, 52), app._prefetched)
+
+    def test_hand_off_to_generation(self):
+        """Посчитанный заранее год показывается сразу, без фонового расчета"""
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        app._prefetch_worker([2027], 52)
+        prefetched = app._prefetched[(2027, 52)][1]
+
+        app.year_var.set("2027")
+        with unittest.mock.patch.object(app, '_apply_generation') as apply, \
+                unittest.mock.patch.object(app, '_generation_worker') as worker:
+            app.generate_calendar()
+        worker.assert_not_called()
+        self.assertIs(apply.call_args.args[1], prefetched)
+        self.assertFalse(app._generation_pending)
+        # Запись забирается из кэша
+        self.assertNotIn((2027, 52), app._prefetched)
+
+    def test_stale_day_is_not_used(self):
+        """Календарь, посчитанный вчера, не отдается: текущая неделя могла смениться"""
+        days = [date(2026, 10, 18)]
+        app = windowless_gui(lambda: days[0])
+        app._prefetch_worker([2027], 52)
+        days[0] += timedelta(days=1)
+        self.assertIsNone(app._take_prefetched(2027, 52))
+        self.assertNotIn((2027, 52), app._prefetched)
+
+        # Другое число недель - другой ключ
+        app._prefetch_worker([2027], 52)
+        self.assertIsNone(app._take_prefetched(2027, 40))
+        self.assertIsNotNone(app._take_prefetched(2027, 52))
+
+
+@unittest.skipIf(gui_app is None, "tkinter не установлен")
+class TestGuiJumpToDate(unittest.TestCase):
+
+    def jump_gui(self, year=2026, weeks=52):
+        app = windowless_gui(lambda: date(2026, 10, 18))
+        app.calendar_data = app.build_calendar_data(year, weeks)
+        app.parity_index = app.build_parity_index(app.calendar_data)
+        app.refresh_table()
+        return app
+
+    def jump(self, app, text):
+        app.jump_var.set(text)
+        return app.jump_to_date()
+
+    def selected_week(self, app):
+        key = next(key for key, iid in app.row_ids.items() if iid == app.tree.selected)
+        return app.row_state[key][0][0]
+
+    def test_full_dates(self):
+        """ДД.ММ.ГГГГ и ГГГГ-ММ-ДД выделяют содержащую неделю"""
+        app = self.jump_gui()
+        self.assertEqual(self.jump(app, "18.10.2026"), 6)
+        self.assertEqual(self.selected_week(app), 7)
+        self.assertEqual(app.status_var.get(), "18.10.2026: неделя 7, нечётная")
+        self.assertEqual(self.jump(app, "2026-08-31"), 0)
+
+    def test_day_and_month(self):
+        """ДД.ММ - первая такая дата не раньше начала календаря"""
+        app = self.jump_gui()
+        self.assertEqual(self.jump(app, "31.08"), 0)
+        self.assertEqual(self.jump(app, "18.10"), 6)
+        # Март уже прошел в 2026 году - берется 2027
+        self.assertEqual(self.jump(app, "15.03"), (date(2027, 3, 15) - date(2026, 8, 31)).days // 7)
+
+    def test_february_29(self):
+        """29.02 ищется в ближайшем високосном году, не дальше 8 лет"""
+        app = self.jump_gui(weeks=300)
+        self.assertEqual(self.jump(app, "29.02"), (date(2028, 2, 29) - date(2026, 8, 31)).days // 7)
+
+        # 2100 - не високосный: от 2096 года ближайшее 29 февраля - в 2104
+        app = self.jump_gui(2096, 500)
+        start = app.calendar_data[0]['start_date']
+        self.assertEqual(self.jump(app, "29.02"), (date(2104, 2, 29) - start).days // 7)
+
+        # В 52-недельном календаре 2026 года 29 февраля нет
+        app = self.jump_gui()
+        self.assertIsNone(self.jump(app, "29.02"))
+        self.assertIn("вне диапазона", app.status_var.get())
+
+    def test_invalid_and_out_of_range(self):
+        """Несуществующая дата и дата вне календаря - сообщение в строке состояния"""
+        app = self.jump_gui()
+        for text in ("30.02", "13.13", "01.13.2026", "abc", ""):
+            with self.subTest(text):
+                self.assertIsNone(self.jump(app, text))
+                self.assertTrue(app.status_var.get().startswith("Некорректная дата"))
+        for text in ("30.08.2026", "2030-01-01"):
+            with self.subTest(text):
+                self.assertIsNone(self.jump(app, text))
+                self.assertIn("вне диапазона календаря", app.status_var.get())
+        self.assertIsNone(app.tree.selected)
+
+        app.clear_output()
+        self.assertIsNone(self.jump(app, "18.10.2026"))
+        self.assertEqual(app.status_var.get(), "Сначала сгенерируйте календарь")
+
+    def test_hidden_by_filter(self):
+        """Неделя, скрытая фильтром, находится, но не выделяется"""
+        app = self.jump_gui()
+        app.filter_parity_var.set("Чётные")
+        app.apply_filters()
+        self.assertEqual(self.jump(app, "18.10.2026"), 6)
+        self.assertTrue(app.status_var.get().endswith("(скрыта фильтром)"))
+        self.assertIsNone(app.tree.selected)
+
+        self.assertEqual(self.jump(app, "25.10.2026"), 7)
+        self.assertEqual(self.selected_week(app), 8)
+
+    def test_virtual_mode_centres_week(self):
+        """В виртуальном режиме окно сдвигается так, чтобы неделя была посередине"""
+        app = self.jump_gui(weeks=1000)
+        self.assertTrue(app.virtual_mode)
+        index = self.jump(app, "01.09.2030")
+        self.assertEqual(app.virtual_offset, index - app.virtual_rows // 2)
+        self.assertEqual(app.tree.selected, app.row_ids[app.virtual_rows // 2])
+        self.assertEqual(self.selected_week(app), index + 1)
+
+        # У начала календаря окно не уходит за первую неделю
+        self.assertEqual(self.jump(app, "01.09.2026"), 0)
+        self.assertEqual(app.virtual_offset, 0)
+        self.assertEqual(app.tree.selected, app.row_ids[0])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file